@@ -1,6 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response, status
+from app.core import metrics
 from app.core.config import settings
+from app.core.keys import key_store, matches_etag
 
 router = APIRouter()
 
@@ -10,6 +12,24 @@ def read_root():
     return {"status": "ok", "timestamp": datetime.now()}
 
 
+@router.get("/metrics")
+def read_metrics():
+    content, media_type = metrics.render()
+    return Response(content=content, media_type=media_type)
+
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks(request: Request):
+    keys = key_store.get()
+    headers = {
+        "ETag": keys.etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+    }
+    if matches_etag(request.headers.get("if-none-match"), keys.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=keys.jwks, media_type="application/json", headers=headers)
+
+
 @router.get("/get_public_rsa_key")
 async def get_verify_key():
-    return {"rsa_public_key": settings.JWT_PUBLIC_KEY_PATH.read_text()}
+    return {"rsa_public_key": key_store.get().public_pem}
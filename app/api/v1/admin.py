@@ -1,17 +1,150 @@
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import UUID4
 from app.core import security
-from app.db import crud
-from app.db.database import get_db
+from app.core.hashing import HashReport, pwd_context
+from app.core.config import settings
+from app.db import crud, schemas, user_import
+from app.db.database import async_session, get_db
+from app.utils.exception import ServerException
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
+EXPORT_FIELDS = [column.key for column in crud.USER_EXPORT_COLUMNS]
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(json.dumps(row._asdict(), default=str) + "\n" for row in rows)
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _export_users(export_format: str, filters: dict):
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    if export_format == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    # The request's session is closed before the body is streamed, so the
+    # export holds its own for as long as the cursor is open.
+    async with async_session() as db:
+        async for rows in crud.stream_users(
+            db, settings.ADMIN_EXPORT_BATCH_SIZE, **filters
+        ):
+            yield encode(rows)
 
-@router.get("/users/{user_id}")
+
+@router.get("/users/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    is_active: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    is_superuser: Optional[bool] = None,
+    user_me: bool = Depends(security.current_superuser),
+):
+    filters = {
+        "is_active": is_active,
+        "email_verified": email_verified,
+        "is_superuser": is_superuser,
+    }
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_users(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post("/users/import", response_model=schemas.UserImportResult)
+async def import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_me: bool = Depends(security.current_superuser),
+):
+    # The body is parsed as it arrives and inserted batch by batch, so the
+    # upload is never held in memory as a whole.
+    records = user_import.PARSERS[format](user_import.iter_lines(request.stream()))
+    stats = await user_import.import_users(records)
+    return stats.summary()
+
+
+@router.post("/users/lookup", response_model=schemas.UserLookupResult)
+async def lookup_users(
+    body: schemas.UserLookup,
+    user_me: bool = Depends(security.current_superuser),
+    db: Session = Depends(get_db),
+):
+    rows = await crud.get_users(db, body.ids, body.usernames)
+    found_ids = {row.id for row in rows}
+    found_usernames = {row.username for row in rows}
+    return {
+        "users": [row._asdict() for row in rows],
+        "missing_ids": [id for id in body.ids if id not in found_ids],
+        "missing_usernames": [
+            username for username in body.usernames if username not in found_usernames
+        ],
+    }
+
+
+@router.get("/password-hashes", response_model=schemas.PasswordHashReport)
+async def password_hash_report(
+    user_me: bool = Depends(security.current_superuser),
+    db: Session = Depends(get_db),
+):
+    report = HashReport()
+    async for hashes in crud.stream_password_hashes(
+        db, settings.ADMIN_EXPORT_BATCH_SIZE
+    ):
+        for hashed_password in hashes:
+            report.add(hashed_password)
+    groups = report.entries()
+    return {
+        "default_scheme": pwd_context.default_scheme(),
+        "total": sum(group["count"] for group in groups),
+        "needs_update": sum(
+            group["count"] for group in groups if group["needs_update"]
+        ),
+        "groups": groups,
+    }
+
+
+@router.get("/users/{user_id}", response_model=schemas.AdminUser)
 async def get_user_by_id(
-    user_id: int,
-    user_me: bool = Depends(security.is_superuser),
+    user_id: UUID4,
+    user_me: bool = Depends(security.current_superuser),
     db: Session = Depends(get_db),
 ):
-    user = crud.get_user_by_id(db, id=user_id)
+    user = await crud.get_user_by_id(db, id=user_id)
+    if user is None:
+        ServerException.user_does_not_exist()
     return user
+
+
+@router.patch("/users/{user_id}/active", response_model=schemas.AdminUser)
+async def set_user_active(
+    user_id: UUID4,
+    body: schemas.UserActiveUpdate,
+    user_me: bool = Depends(security.current_superuser),
+    db: Session = Depends(get_db),
+):
+    if not await crud.set_user_active(db, user_id, body.is_active):
+        ServerException.user_does_not_exist()
+    return await crud.get_user_by_id(db, id=user_id)
+
+
+@router.post("/users/sessions/revoke", response_model=schemas.SessionsRevoked)
+async def revoke_users_sessions(
+    body: schemas.BulkSessionRevoke,
+    user_me: bool = Depends(security.current_superuser),
+    db: Session = Depends(get_db),
+):
+    return {"revoked": await crud.revoke_sessions(db, body.user_ids)}
@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, status, Response, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 
-from app.core import security
+from app.core import metrics, security
 from app.core.config import settings
+from app.core.rate_limit import login_limiter
 from app.db import crud, schemas
 from app.db.database import get_db
 from app.utils import cookie
@@ -22,18 +33,9 @@ async def register_and_login(
     responce: Response,
     db: AsyncSession = Depends(get_db),
 ):
-    db_user = await crud.get_user_by_username(db, username=user.username)
-    if db_user:
-        ServerException.username_already_registered()
-    db_user = await crud.get_user_by_email(db, email=user.email)
-    if db_user:
-        ServerException.email_already_registered()
     user = await crud.create_user(db=db, user=user)
 
-    access_token = security.create_access_token(
-        data={"sub": user.username},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-    )
+    access_token = security.create_user_access_token(user)
     refresh_token, _ = await crud.create_refresh_token(
         db,
         user_id=user.id,
@@ -46,24 +48,40 @@ async def register_and_login(
 
 
 @router.get("/verify_email")
-async def verify_email(email_token: str):
-    pass
+async def verify_email(email_token: str, db: AsyncSession = Depends(get_db)):
+    if await crud.verify_email(db, email_token) is None:
+        ServerException.invalid_email_token()
+    return {"message": "Email verified"}
 
 
 @router.post("/login", response_model=schemas.TokenResponse)
 async def login(
-    form_data: schemas.UserAuth,
+    form_data: schemas.UserLogin,
     responce: Response,
+    request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
-    user = await security.authenticate_user(db, form_data.username, form_data.password)
+    # Throttled before the user lookup and the password hash.
+    if login_limiter is not None:
+        client_ip = request.client.host if request.client else ""
+        await login_limiter.check(client_ip, form_data.username)
+
+    user = await security.authenticate_user(
+        db, form_data.username, form_data.password, background_tasks
+    )
     if not user:
+        metrics.login_failure.inc()
+        if login_limiter is not None:
+            await login_limiter.record_failure(form_data.username)
         ServerException.incorrect_username_or_password()
+    if not user.is_active:
+        ServerException.inactive_user()
+    metrics.login_success.inc()
+    if login_limiter is not None:
+        await login_limiter.record_success(form_data.username)
 
-    access_token = security.create_access_token(
-        data={"sub": user.username},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-    )
+    access_token = security.create_user_access_token(user)
     refresh_token, _ = await crud.create_refresh_token(
         db,
         user_id=user.id,
@@ -85,25 +103,14 @@ async def refresh_tokens(
     if not refresh_token:
         ServerException.refresh_token_missing()
 
-    db_token = await security.verify_refresh_token(db, refresh_token)
-
-    if not db_token:
-        cookie.delete_refresh_token_cookie(responce)
-        ServerException.invalid_refresh_token()
-
-    old_token = await crud.revoke_refresh_token_by_id(db, db_token.id)
-    user = await crud.get_user_by_id(db, db_token.user_id)
-
-    access_token = security.create_access_token(
-        data={"sub": user.username},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-    )
-    refresh_token, _ = await crud.create_refresh_token(
+    token_id = security.get_refresh_token_id(refresh_token)
+    refresh_token, user = await crud.rotate_refresh_token(
         db,
-        user_id=db_token.user_id,
+        token_id,
         expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        previous_token_id=old_token.id,
     )
+    access_token = security.create_user_access_token(user)
+
     cookie.delete_refresh_token_cookie(responce)
     cookie.set_refresh_token_cookie(responce, refresh_token)
 
@@ -114,17 +121,60 @@ async def refresh_tokens(
 async def logout(
     responce: Response,
     request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        HTTPBearer(auto_error=False)
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     refresh_token = request.cookies.get(settings.REFRESH_TOKEN_COOKIE_NAME)
-    db_token = await security.verify_refresh_token(db, refresh_token)
-    if db_token:
-        await crud.revoke_refresh_token_by_id(db, db_token.id)
+    if refresh_token:
+        # An expired or unverifiable cookie has nothing left to revoke, but
+        # it must still be cleared.
+        try:
+            token_id = security.get_refresh_token_id(refresh_token)
+        except HTTPException:
+            token_id = None
+        if token_id is not None:
+            await crud.revoke_refresh_token_by_id(db, token_id)
+    if credentials is not None:
+        await security.revoke_access_token(db, credentials.credentials)
 
     cookie.delete_refresh_token_cookie(responce)
     return {"message": "Logget out succsessfully"}
 
 
-@router.post("/forgot-password")
-async def forgot_password():
-    pass
+@router.post(
+    "/introspect",
+    response_model=schemas.TokenIntrospectionResult,
+    response_model_exclude_none=True,
+)
+async def introspect(
+    body: schemas.TokenIntrospect,
+    client_id: str = Depends(security.introspection_client),
+    db: AsyncSession = Depends(get_db),
+):
+    return {"results": await security.introspect_tokens(db, client_id, body.tokens)}
+
+
+@router.post("/forgot-password", status_code=status.HTTP_202_ACCEPTED)
+async def forgot_password(
+    body: schemas.ForgotPassword,
+    request: Request,
+    background_tasks: BackgroundTasks,
+):
+    # Throttled per client and per address, so reset mails cannot be sprayed.
+    if login_limiter is not None:
+        client_ip = request.client.host if request.client else ""
+        await login_limiter.check_password_reset(client_ip, body.email)
+    # The lookup runs after the response, so timing does not reveal accounts.
+    background_tasks.add_task(security.send_password_reset, body.email)
+    return {"message": "If the account exists, a reset link has been sent"}
+
+
+@router.post("/reset-password")
+async def reset_password(
+    body: schemas.PasswordReset,
+    db: AsyncSession = Depends(get_db),
+):
+    await security.reset_password(db, body.token, body.new_password)
+    return {"message": "Password has been reset"}
@@ -1,43 +1,116 @@
-from fastapi import APIRouter, Depends
+from datetime import timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
 from app.core import security
-from app.db import crud, models
+from app.core.config import settings
+from app.db import crud, models, schemas
 from app.db.database import get_db
+from app.utils import cookie
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.exception import ServerException
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.get("")
+@router.get("", response_model=schemas.User)
 async def read_users_me(
-    current_user: models.User = Depends(security.get_current_active_user),
+    current_user: models.User = Depends(security.current_active_user),
+    db: Session = Depends(get_db),
 ):
+    # Stateless tokens carry no email, so the profile comes from the user row.
+    if isinstance(current_user, schemas.TokenUser):
+        current_user = await crud.get_user_by_id(db, current_user.id)
+        if current_user is None:
+            ServerException.credentials_exception()
     return current_user
 
 
 @router.put("")
 async def write_users_me(
-    current_user: models.User = Depends(security.get_current_active_user),
+    current_user: models.User = Depends(security.current_active_user),
 ):
     pass
 
 
-@router.get("/sessions")
+@router.get("/sessions", response_model=schemas.SessionsPage)
 async def get_sessions(
-    current_user: models.User = Depends(security.get_current_active_user),
+    limit: Optional[int] = Query(None, ge=1, le=settings.SESSIONS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(security.current_active_user),
     db: Session = Depends(get_db),
 ):
-    return await crud.get_refresh_tokens(db, 5, current_user.id)
+    limit = limit or settings.SESSIONS_PAGE_SIZE
+    after = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page exists without a COUNT.
+    rows = await crud.get_refresh_tokens(db, current_user.id, limit + 1, after)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {
+        "items": [schemas.RefreshTokenResponse(**row._mapping) for row in rows],
+        "next_cursor": next_cursor,
+    }
 
 
-@router.delete("/sessions")
+@router.delete("/sessions", response_model=schemas.SessionsRevoked)
 async def delete_sessions(
-    current_user: models.User = Depends(security.get_current_active_user),
+    request: Request,
+    response: Response,
+    keep_current: bool = False,
+    current_user: models.User = Depends(security.current_active_user),
+    db: Session = Depends(get_db),
 ):
-    pass
+    current_token_id = None
+    refresh_token = request.cookies.get(settings.REFRESH_TOKEN_COOKIE_NAME)
+    if keep_current and refresh_token:
+        current_token_id = security.get_refresh_token_id(refresh_token)
+
+    revoked = await crud.revoke_sessions(
+        db, [current_user.id], except_token_id=current_token_id
+    )
+    if current_token_id is None:
+        cookie.delete_refresh_token_cookie(response)
+        return {"revoked": revoked}
 
+    # The version bump also retired the caller's access token, so the kept
+    # session gets a replacement.
+    user = await crud.get_user_by_id(db, current_user.id)
+    return {
+        "revoked": revoked,
+        "access_token": security.create_user_access_token(user),
+        "token_type": "bearer",
+    }
 
-@router.patch("/password")
+
+@router.patch("/password", response_model=schemas.TokenResponse)
 async def change_password(
-    current_user: models.User = Depends(security.get_current_active_user),
+    body: schemas.PasswordChange,
+    response: Response,
+    current_user: models.User = Depends(security.current_active_user),
+    db: Session = Depends(get_db),
 ):
-    pass
+    user = await crud.get_user_by_id(db, current_user.id)
+    if user is None:
+        ServerException.credentials_exception()
+    hashed_password = await crud.get_hashed_password(db, user)
+    if not await security.verify_password(body.current_password, hashed_password):
+        ServerException.incorrect_password()
+    new_hash = await security.get_password_hash(body.new_password)
+    if not await crud.set_password(db, user.id, hashed_password, new_hash):
+        ServerException.incorrect_password()
+
+    # Every session was revoked, the caller continues on a fresh one.
+    user = await crud.get_user_by_id(db, user.id)
+    refresh_token, _ = await crud.create_refresh_token(
+        db,
+        user_id=user.id,
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    cookie.set_refresh_token_cookie(response, refresh_token)
+    return {
+        "access_token": security.create_user_access_token(user),
+        "token_type": "bearer",
+    }
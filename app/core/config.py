@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, PostgresDsn
 
@@ -28,18 +28,98 @@ class Settings(BaseSettings):
 
     JWT_PRIVATE_KEY_PATH: Path
     JWT_PUBLIC_KEY_PATH: Path
-    ALGORITHM: str
+    JWT_VERIFY_KEY_PATHS: List[Path] = []
+    JWT_KEY_RELOAD_INTERVAL_SECONDS: float = 5
+    JWKS_MAX_AGE_SECONDS: int = 300
+    ALGORITHM: str = "RS256"
+    VERIFIED_TOKEN_CACHE_SIZE: int = 10000
+    INTROSPECTION_CLIENTS: Dict[str, str] = {}
+    INTROSPECTION_CACHE_SIZE: int = 10000
+    INTROSPECTION_CACHE_TTL_SECONDS: float = 30
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Access tokens are checked from their claims only. A token_version bump
+    # reaches other workers through the revocation list: instantly with
+    # ACCESS_TOKEN_REVOCATION_URL, otherwise within
+    # ACCESS_TOKEN_REVOCATION_SYNC_SECONDS.
+    STATELESS_ACCESS_TOKENS: bool = False
+    AUTH_MIDDLEWARE: bool = False
+    AUTH_MIDDLEWARE_PATHS: List[str] = [
+        "/api/v1/users/me",
+        "/api/v1/admin",
+        "/api/v1/2fa",
+    ]
+    ACCESS_TOKEN_REVOCATION_SYNC_SECONDS: float = 5
+    ACCESS_TOKEN_REVOCATION_URL: Optional[str] = None
     REFRESH_TOKEN_EXPIRE_DAYS: int
     REFRESH_TOKEN_COOKIE_NAME: str
     REFRESH_TOKEN_HTTP_ONLY: bool
     REFRESH_TOKEN_SECURE: bool
     REFRESH_TOKEN_SAME_SITE: str
+    SESSIONS_PAGE_SIZE: int = 20
+    SESSIONS_MAX_PAGE_SIZE: int = 100
+    ADMIN_EXPORT_BATCH_SIZE: int = 1000
+    USER_IMPORT_BATCH_SIZE: int = 500
+    USER_IMPORT_HASH_CONCURRENCY: int = 2
+    REFRESH_TOKEN_PURGE_ENABLED: bool = False
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+    REFRESH_TOKEN_PURGE_BATCH_PAUSE_SECONDS: float = 0.1
+    REFRESH_TOKEN_PURGE_RETENTION_DAYS: int = 7
+
+    EMAIL_FROM: str = "noreply@localhost"
+    EMAIL_VERIFICATION_URL: str = (
+        "http://localhost:8000/api/v1/auth/verify_email?email_token={token}"
+    )
+    EMAIL_VERIFICATION_EXPIRE_HOURS: int = 24
+    PASSWORD_RESET_URL: str = "http://localhost:8000/reset-password?token={token}"
+    PASSWORD_RESET_EXPIRE_MINUTES: int = 30
+    EMAIL_OUTBOX_INTERVAL_SECONDS: float = 1
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 60
+    EMAIL_OUTBOX_RETRY_SECONDS: float = 30
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    # "memory" keeps messages in process instead of sending them, for tests
+    # and local runs only.
+    EMAIL_BACKEND: Literal["smtp", "memory"] = "smtp"
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10
 
     CRYPTO_CONTEXT: CryptContextSettings = Field(default_factory=CryptContextSettings)
 
     DATABASE_URL: PostgresDsn
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    USER_CACHE_BACKEND: Literal["none", "local", "shared"] = "local"
+    USER_CACHE_URL: Optional[str] = None
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    LOGIN_RATE_LIMIT_BACKEND: Literal["none", "local", "shared"] = "local"
+    LOGIN_RATE_LIMIT_URL: Optional[str] = None
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 30
+    LOGIN_RATE_LIMIT_PER_LOGIN: int = 10
+    LOGIN_RATE_LIMIT_PER_PAIR: int = 5
+    LOGIN_LOCKOUT_THRESHOLD: int = 5
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 1
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 900
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+
+from app.core import metrics
+from app.core.config import settings
+from app.utils.exception import ServerException
+
+
+pwd_context = CryptContext(**settings.CRYPTO_CONTEXT.config_dict)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+_HISTOGRAMS = {
+    _hash: metrics.password_hash_seconds,
+    _verify: metrics.password_verify_seconds,
+}
+
+
+def _timed(func: Callable, *args) -> tuple[Any, float]:
+    # Runs inside the worker, so the duration excludes pool dispatch overhead.
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+
+# Attributes that describe a hash's cost; each scheme only has some of them.
+_COST_ATTRIBUTES = ("type", "version", "memory_cost", "rounds", "parallelism")
+
+
+def _cost_prefix(hashed_password: str) -> str:
+    # Everything before salt and digest. bcrypt packs both into one segment.
+    if hashed_password.startswith(("$2a$", "$2b$", "$2y$")):
+        return hashed_password[:7]
+    return hashed_password.rsplit("$", 2)[0]
+
+
+def describe_hash(hashed_password: str) -> dict:
+    scheme = pwd_context.identify(hashed_password, required=False)
+    if scheme is None:
+        return {"scheme": None, "params": {}, "needs_update": True}
+    parsed = pwd_context.handler(scheme).from_string(hashed_password)
+    params = {}
+    for attribute in _COST_ATTRIBUTES:
+        value = getattr(parsed, attribute, None)
+        if value is not None:
+            params[attribute] = value
+    return {
+        "scheme": scheme,
+        "params": params,
+        "needs_update": pwd_context.needs_update(hashed_password),
+    }
+
+
+class HashReport:
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._samples: dict[str, str] = {}
+
+    def add(self, hashed_password: Optional[str]) -> None:
+        prefix = _cost_prefix(hashed_password) if hashed_password else ""
+        if prefix not in self._counts:
+            self._counts[prefix] = 0
+            self._samples[prefix] = hashed_password or ""
+        self._counts[prefix] += 1
+
+    def entries(self) -> list[dict]:
+        # Hashes are grouped by their cost prefix while streaming, passlib only
+        # parses one sample per group.
+        entries = [
+            {**describe_hash(self._samples[prefix]), "count": count}
+            for prefix, count in self._counts.items()
+        ]
+        return sorted(entries, key=lambda entry: entry["count"], reverse=True)
+
+
+class HashingStats:
+    def __init__(self):
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    def record(self, queue_wait: float, hash_time: float) -> None:
+        self.completed += 1
+        self.queue_wait_seconds_total += queue_wait
+        self.hash_seconds_total += hash_time
+        if queue_wait > self.queue_wait_seconds_max:
+            self.queue_wait_seconds_max = queue_wait
+        if hash_time > self.hash_seconds_max:
+            self.hash_seconds_max = hash_time
+
+    def snapshot(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_seconds_avg": self.queue_wait_seconds_total / completed,
+            "queue_wait_seconds_max": self.queue_wait_seconds_max,
+            "hash_seconds_avg": self.hash_seconds_total / completed,
+            "hash_seconds_max": self.hash_seconds_max,
+        }
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        max_concurrency: int = 4,
+        max_queue: int = 64,
+        retry_after: int = 1,
+    ):
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.stats = HashingStats()
+
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers or self.max_concurrency,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self._pending >= self.max_concurrency + self.max_queue:
+            self.stats.rejected += 1
+            ServerException.password_hashing_overloaded(self.retry_after)
+        return await self._execute(func, *args)
+
+    async def _execute(self, func: Callable, *args) -> Any:
+        self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            async with self._semaphore:
+                queue_wait = time.perf_counter() - queued_at
+                loop = asyncio.get_running_loop()
+                result, hash_time = await loop.run_in_executor(
+                    self.executor, _timed, func, *args
+                )
+        finally:
+            self._pending -= 1
+
+        self.stats.record(queue_wait, hash_time)
+        metrics.PASSWORD_QUEUE_WAIT_SECONDS.observe(queue_wait)
+        histogram = _HISTOGRAMS.get(func)
+        if histogram is not None:
+            histogram.observe(hash_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(_verify, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str], concurrency: int) -> list[str]:
+        # Bulk callers wait for a slot instead of being rejected, but keep at
+        # most `concurrency` of their hashes queued so logins are not starved.
+        gate = asyncio.Semaphore(concurrency)
+
+        async def hash_one(password: str) -> str:
+            async with gate:
+                return await self._execute(_hash, password)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+metrics.gauges.add(
+    "auth_password_pending",
+    "Password operations running or queued for a hashing slot",
+    lambda: hasher.pending,
+)
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from jose.backends.base import Key
+
+from app.core.config import settings
+from app.utils import signing_keys
+
+
+logger = logging.getLogger(__name__)
+
+# RFC 7638: the thumbprint covers only the required members of each key type.
+_THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+}
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def thumbprint(public_jwk: dict) -> str:
+    members = _THUMBPRINT_MEMBERS[public_jwk["kty"]]
+    canonical = json.dumps(
+        {member: public_jwk[member] for member in members},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    return _b64url(hashlib.sha256(canonical.encode()).digest())
+
+
+class KeySet:
+    def __init__(
+        self, private_pem: str, public_pem: str, verify_pems: tuple[str, ...] = ()
+    ):
+        self.signing_key, self.algorithm = signing_keys.parse_key(private_pem)
+        if self.signing_key.is_public():
+            raise RuntimeError("JWT signing key must be a private key")
+        verifying_key, algorithm = signing_keys.parse_key(public_pem)
+        self.public_pem = public_pem
+        self.kid = thumbprint(verifying_key.to_dict())
+        if thumbprint(self.signing_key.public_key().to_dict()) != self.kid:
+            raise RuntimeError("JWT private and public keys do not match")
+
+        # Every published key verifies with its own algorithm, so tokens signed
+        # before an algorithm migration stay valid while their key is listed.
+        self.verifying_keys: dict[str, tuple[Key, str]] = {
+            self.kid: (verifying_key, algorithm)
+        }
+        for pem in verify_pems:
+            key, algorithm = signing_keys.parse_key(pem)
+            if not key.is_public():
+                raise RuntimeError("Verification keys must be public keys")
+            self.verifying_keys.setdefault(thumbprint(key.to_dict()), (key, algorithm))
+
+        jwks = {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, (key, _) in self.verifying_keys.items()
+            ]
+        }
+        self.jwks = json.dumps(jwks, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.jwks).hexdigest()[:32]}"'
+
+
+class KeyStore:
+    def __init__(
+        self,
+        private_key_path: Path,
+        public_key_path: Path,
+        verify_key_paths: tuple[Path, ...] = (),
+        reload_interval: float = 5,
+    ):
+        self.paths = (private_key_path, public_key_path, *verify_key_paths)
+        self.reload_interval = reload_interval
+        self._listeners: list[Callable[[], None]] = []
+
+        self._mtimes = self._stat()
+        self.current = self._load()
+        self._checked_at = time.monotonic()
+
+    def on_reload(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def get(self) -> KeySet:
+        if self.reload_interval <= 0:
+            return self.current
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return self.current
+        self._checked_at = now
+        self.reload()
+        return self.current
+
+    def reload(self, force: bool = False) -> bool:
+        try:
+            mtimes = self._stat()
+        except OSError as e:
+            logger.warning("Key files unavailable, keeping current keys: %s", e)
+            return False
+        if mtimes == self._mtimes and not force:
+            return False
+
+        try:
+            key_set = self._load()
+        except RuntimeError as e:
+            # Most likely a rotation caught half way; the mtimes stay stale so
+            # the next check retries.
+            logger.warning("Key reload failed, keeping current keys: %s", e)
+            return False
+
+        self._mtimes = mtimes
+        self.current = key_set
+        for listener in self._listeners:
+            listener()
+        logger.info("Reloaded JWT keys, signing kid %s", key_set.kid)
+        return True
+
+    def _stat(self) -> tuple[int, ...]:
+        return tuple(path.stat().st_mtime_ns for path in self.paths)
+
+    def _load(self) -> KeySet:
+        private_pem, public_pem, *verify_pems = signing_keys.load_key_files(self.paths)
+        return KeySet(private_pem, public_pem, tuple(verify_pems))
+
+
+key_store = KeyStore(
+    settings.JWT_PRIVATE_KEY_PATH,
+    settings.JWT_PUBLIC_KEY_PATH,
+    tuple(settings.JWT_VERIFY_KEY_PATHS),
+    reload_interval=settings.JWT_KEY_RELOAD_INTERVAL_SECONDS,
+)
+
+
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
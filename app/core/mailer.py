@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import smtplib
+from collections import deque
+from email.message import EmailMessage
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(recipient: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+def verification_message(username: str, token: str) -> tuple[str, str]:
+    link = settings.EMAIL_VERIFICATION_URL.format(token=token)
+    return (
+        "Confirm your email",
+        f"Hi {username},\n\nConfirm your email address by opening {link}\n\n"
+        f"The link expires in {settings.EMAIL_VERIFICATION_EXPIRE_HOURS} hours.\n",
+    )
+
+
+def password_reset_message(username: str, token: str) -> tuple[str, str]:
+    link = settings.PASSWORD_RESET_URL.format(token=token)
+    return (
+        "Reset your password",
+        f"Hi {username},\n\nSet a new password by opening {link}\n\n"
+        f"The link expires in {settings.PASSWORD_RESET_EXPIRE_MINUTES} minutes "
+        "and works once. Ignore this email if you did not ask for it.\n",
+    )
+
+
+class SMTPMailer:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        timeout: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send_batch(self, messages: list[EmailMessage]) -> list[Optional[str]]:
+        # One connection per batch; a rejected recipient only fails its message.
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            errors = []
+            for message in messages:
+                try:
+                    smtp.send_message(message)
+                    errors.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    errors.append(str(e))
+            return errors
+
+    async def send_batch(self, messages: list[EmailMessage]) -> list[Optional[str]]:
+        # smtplib blocks, so delivery runs off the event loop.
+        return await asyncio.to_thread(self._send_batch, messages)
+
+
+class MemoryMailer:
+    # Keeps the last messages instead of delivering them, for local runs and tests.
+    def __init__(self, max_size: int = 1000):
+        self.sent: deque[EmailMessage] = deque(maxlen=max_size)
+
+    async def send_batch(self, messages: list[EmailMessage]) -> list[Optional[str]]:
+        self.sent.extend(messages)
+        return [None] * len(messages)
+
+
+def create_mailer():
+    if settings.EMAIL_BACKEND == "memory":
+        return MemoryMailer()
+    if settings.SMTP_HOST:
+        return SMTPMailer(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+    logger.warning("SMTP_HOST is not set, outgoing emails stay in the outbox")
+    return None
+
+
+mailer = create_mailer()
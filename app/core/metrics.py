@@ -0,0 +1,185 @@
+import functools
+import time
+from typing import Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+registry = CollectorRegistry()
+
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+SLOW_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_BUCKETS = FAST_BUCKETS + SLOW_BUCKETS[6:]
+
+JWT_SECONDS = Histogram(
+    "auth_jwt_seconds",
+    "JWT sign and verify duration",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+    registry=registry,
+)
+PASSWORD_SECONDS = Histogram(
+    "auth_password_seconds",
+    "Password hash and verify duration inside the worker pool",
+    ["operation"],
+    buckets=SLOW_BUCKETS,
+    registry=registry,
+)
+PASSWORD_QUEUE_WAIT_SECONDS = Histogram(
+    "auth_password_queue_wait_seconds",
+    "Time a password operation waited for a hashing slot",
+    buckets=SLOW_BUCKETS,
+    registry=registry,
+)
+DB_QUERY_SECONDS = Histogram(
+    "auth_db_query_seconds",
+    "crud function duration",
+    ["function"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "auth_db_pool_wait_seconds",
+    "Time spent acquiring a connection from the pool",
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+DB_POOL_EVENTS = Counter(
+    "auth_db_pool_events",
+    "Connection pool overflow connections and checkout timeouts",
+    ["event"],
+    registry=registry,
+)
+REQUEST_SECONDS = Histogram(
+    "auth_http_request_seconds",
+    "HTTP request duration per route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+LOGINS = Counter(
+    "auth_logins", "Login attempts by result", ["result"], registry=registry
+)
+REFRESH_ROTATIONS = Counter(
+    "auth_refresh_rotations", "Refresh token rotations", registry=registry
+)
+REFRESH_TOKEN_REUSE = Counter(
+    "auth_refresh_token_reuse",
+    "Rotated refresh tokens presented again",
+    registry=registry,
+)
+EMAILS = Counter(
+    "auth_emails", "Outbox email deliveries by result", ["result"], registry=registry
+)
+PASSWORD_REHASH = Counter(
+    "auth_password_rehash",
+    "Outdated password hashes upgraded on login",
+    registry=registry,
+)
+
+# Children are bound once here so the hot path never resolves label values.
+jwt_sign_seconds = JWT_SECONDS.labels("sign")
+jwt_verify_seconds = JWT_SECONDS.labels("verify")
+password_hash_seconds = PASSWORD_SECONDS.labels("hash")
+password_verify_seconds = PASSWORD_SECONDS.labels("verify")
+db_pool_overflows = DB_POOL_EVENTS.labels("overflow")
+db_pool_timeouts = DB_POOL_EVENTS.labels("timeout")
+login_success = LOGINS.labels("success")
+login_failure = LOGINS.labels("failure")
+login_throttled = LOGINS.labels("throttled")
+emails_sent = EMAILS.labels("sent")
+emails_failed = EMAILS.labels("failed")
+
+
+def timed_query(func: Callable) -> Callable:
+    histogram = DB_QUERY_SECONDS.labels(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started_at)
+
+    return wrapper
+
+
+class CacheCollector:
+    def __init__(self):
+        self._caches: dict[str, Callable[[], dict]] = {}
+
+    def add(self, name: str, stats: Callable[[], dict]) -> None:
+        self._caches[name] = stats
+
+    def collect(self):
+        hits = CounterMetricFamily("auth_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily(
+            "auth_cache_misses", "Cache misses", labels=["cache"]
+        )
+        evictions = CounterMetricFamily(
+            "auth_cache_evictions", "Cache evictions", labels=["cache"]
+        )
+        size = GaugeMetricFamily("auth_cache_size", "Cache entries", labels=["cache"])
+        for name, stats in self._caches.items():
+            snapshot = stats()
+            hits.add_metric([name], snapshot["hits"])
+            misses.add_metric([name], snapshot["misses"])
+            if "evictions" in snapshot:
+                evictions.add_metric([name], snapshot["evictions"])
+            if "size" in snapshot:
+                size.add_metric([name], snapshot["size"])
+        yield from (hits, misses, evictions, size)
+
+
+caches = CacheCollector()
+registry.register(caches)
+
+
+class GaugeCollector:
+    def __init__(self):
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def add(self, name: str, documentation: str, value: Callable[[], float]) -> None:
+        self._gauges[name] = (documentation, value)
+
+    def collect(self):
+        for name, (documentation, value) in self._gauges.items():
+            yield GaugeMetricFamily(name, documentation, value=value())
+
+
+gauges = GaugeCollector()
+registry.register(gauges)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._histograms: dict[tuple[str, str], object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = REQUEST_SECONDS.labels(*key)
+            histogram.observe(time.perf_counter() - started_at)
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,234 @@
+import math
+import time
+from typing import Any, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.exception import ServerException
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+class LocalRateLimitBackend:
+    def __init__(self, max_size: int):
+        # Least recently touched keys are dropped first, so a flood of new
+        # keys cannot grow memory past max_size.
+        self._entries = TTLCache(max_size=max_size)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        counter = self._entries.get(key)
+        if counter is None:
+            # Boxed so later increments keep the expiry set by the first one.
+            counter = [0]
+            self._entries.set(key, counter, expires_at=time.time() + ttl)
+        counter[0] += 1
+        return counter[0]
+
+    async def get(self, key: str) -> Optional[float]:
+        item = self._entries.get(key)
+        return None if item is None else item[0]
+
+    async def set(self, key: str, value: float, ttl: float) -> None:
+        self._entries.set(key, [value], expires_at=time.time() + ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class SharedRateLimitBackend:
+    # Works with any redis-compatible asyncio client (incr / expire / get / set(ex=) / delete).
+    def __init__(self, client: Any, prefix: str = "auth:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def incr(self, key: str, ttl: float) -> int:
+        count = await self.client.incr(self.prefix + key)
+        if count == 1:
+            await self.client.expire(self.prefix + key, math.ceil(ttl))
+        return count
+
+    async def get(self, key: str) -> Optional[float]:
+        value = await self.client.get(self.prefix + key)
+        return None if value is None else float(value)
+
+    async def set(self, key: str, value: float, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=math.ceil(ttl))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+class FakeSharedCounterClient:
+    # In-process stand-in for a shared counter server, used for local runs and tests.
+    def __init__(self):
+        self._data: dict[str, list] = {}
+
+    def _get(self, key: str) -> Optional[list]:
+        item = self._data.get(key)
+        if item is not None and item[0] is not None and item[0] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    async def incr(self, key: str) -> int:
+        item = self._get(key)
+        if item is None:
+            item = self._data[key] = [None, 0]
+        item[1] = int(item[1]) + 1
+        return item[1]
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        item = self._get(key)
+        if item is None:
+            return False
+        item[0] = time.time() + seconds
+        return True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._get(key)
+        return None if item is None else str(item[1]).encode()
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        self._data[key] = [time.time() + ex if ex else None, value]
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+class LoginRateLimiter:
+    def __init__(
+        self,
+        backend: Any,
+        window: float,
+        ip_limit: int,
+        login_limit: int,
+        pair_limit: int,
+        lockout_threshold: int,
+        lockout_base: float,
+        lockout_max: float,
+    ):
+        self.backend = backend
+        self.window = window
+        self.ip_limit = ip_limit
+        self.login_limit = login_limit
+        self.pair_limit = pair_limit
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+
+    async def _hit(self, key: str, limit: int, now: float) -> Optional[int]:
+        # Sliding window counter: the previous fixed window is weighted by how
+        # much of it still overlaps the sliding one. Two counters per key.
+        index, elapsed = divmod(now, self.window)
+        current = await self.backend.incr(f"{key}:{int(index)}", 2 * self.window)
+        previous = await self.backend.get(f"{key}:{int(index) - 1}") or 0
+        weight = 1 - elapsed / self.window
+        if previous * weight + current <= limit:
+            return None
+
+        if current < limit:
+            # Wait until the previous window has decayed enough.
+            wait = (1 - (limit - current) / previous) * self.window - elapsed
+        else:
+            # Wait for the next window, then for this one to decay.
+            wait = self.window - elapsed + (1 - limit / current) * self.window
+        return max(1, math.ceil(wait))
+
+    async def _hit_all(self, limits: tuple, now: float) -> int:
+        retry_after = 0
+        for key, limit in limits:
+            if limit > 0:
+                retry_after = max(retry_after, await self._hit(key, limit, now) or 0)
+        return retry_after
+
+    async def check(self, ip: str, login: str) -> None:
+        now = time.time()
+        login = login.strip().lower()
+
+        locked_until = await self.backend.get(f"lock:{login}")
+        if locked_until is not None and locked_until > now:
+            metrics.login_throttled.inc()
+            ServerException.too_many_login_attempts(math.ceil(locked_until - now))
+
+        retry_after = await self._hit_all(
+            (
+                (f"ip:{ip}", self.ip_limit),
+                (f"login:{login}", self.login_limit),
+                (f"pair:{ip}:{login}", self.pair_limit),
+            ),
+            now,
+        )
+        if retry_after:
+            metrics.login_throttled.inc()
+            ServerException.too_many_login_attempts(retry_after)
+
+    async def check_password_reset(self, ip: str, email: str) -> None:
+        # Own keys and no lockout, so reset requests for an address never use
+        # up or block the /login budget of its owner.
+        email = email.strip().lower()
+        retry_after = await self._hit_all(
+            (
+                (f"reset:ip:{ip}", self.ip_limit),
+                (f"reset:email:{email}", self.login_limit),
+            ),
+            time.time(),
+        )
+        if retry_after:
+            ServerException.too_many_requests(retry_after)
+
+    async def record_failure(self, login: str) -> None:
+        if self.lockout_threshold <= 0:
+            return
+        login = login.strip().lower()
+        failures = await self.backend.incr(f"failures:{login}", self.lockout_max)
+        if failures < self.lockout_threshold:
+            return
+        # Each failure past the threshold doubles the lockout.
+        lockout = min(
+            self.lockout_max,
+            self.lockout_base * 2 ** min(failures - self.lockout_threshold, 32),
+        )
+        await self.backend.set(f"lock:{login}", time.time() + lockout, lockout)
+
+    async def record_success(self, login: str) -> None:
+        login = login.strip().lower()
+        await self.backend.delete(f"failures:{login}", f"lock:{login}")
+
+
+def create_login_limiter() -> Optional[LoginRateLimiter]:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "none":
+        return None
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "shared":
+        if settings.LOGIN_RATE_LIMIT_URL:
+            if redis is None:
+                raise RuntimeError("LOGIN_RATE_LIMIT_URL requires the 'redis' package")
+            client = redis.from_url(settings.LOGIN_RATE_LIMIT_URL)
+        else:
+            client = FakeSharedCounterClient()
+        backend = SharedRateLimitBackend(client)
+    else:
+        backend = LocalRateLimitBackend(max_size=settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+        metrics.caches.add("login_rate_limit", backend.stats)
+    return LoginRateLimiter(
+        backend,
+        window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+        ip_limit=settings.LOGIN_RATE_LIMIT_PER_IP,
+        login_limit=settings.LOGIN_RATE_LIMIT_PER_LOGIN,
+        pair_limit=settings.LOGIN_RATE_LIMIT_PER_PAIR,
+        lockout_threshold=settings.LOGIN_LOCKOUT_THRESHOLD,
+        lockout_base=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+        lockout_max=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+    )
+
+
+login_limiter = create_login_limiter()
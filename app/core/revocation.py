@@ -0,0 +1,135 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[str, float], None]
+
+
+class LocalRevocationTransport:
+    # In-process fan-out, stands in for a broker in single-worker runs and tests.
+    def __init__(self):
+        self._subscribers: list[Subscriber] = []
+
+    def subscribe(self, callback: Subscriber) -> None:
+        self._subscribers.append(callback)
+
+    async def publish(self, jti: str, expires_at: float) -> None:
+        for callback in self._subscribers:
+            callback(jti, expires_at)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class SharedRevocationTransport:
+    # Works with any redis-compatible asyncio client (publish / pubsub).
+    def __init__(self, client: Any, channel: str = "auth:revoked-access-tokens"):
+        self.client = client
+        self.channel = channel
+        self._subscribers: list[Subscriber] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, callback: Subscriber) -> None:
+        self._subscribers.append(callback)
+
+    async def publish(self, jti: str, expires_at: float) -> None:
+        await self.client.publish(
+            self.channel, json.dumps({"jti": jti, "exp": expires_at})
+        )
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = json.loads(message["data"])
+                        for callback in self._subscribers:
+                            callback(data["jti"], data["exp"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Missed messages are picked up by the periodic table sync.
+                logger.exception("Revocation subscription failed, reconnecting")
+                await asyncio.sleep(1)
+
+
+class RevocationList:
+    def __init__(self, transport: Any):
+        self.transport = transport
+        self._expiries: dict[str, float] = {}
+        transport.subscribe(self.add)
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        if expires_at > time.time():
+            self._expiries[jti] = expires_at
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._expiries
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        self.add(jti, expires_at)
+        await self.transport.publish(jti, expires_at)
+
+    def prune(self) -> int:
+        now = time.time()
+        expired = [jti for jti, expires_at in self._expiries.items() if expires_at <= now]
+        for jti in expired:
+            del self._expiries[jti]
+        return len(expired)
+
+    def clear(self) -> None:
+        self._expiries.clear()
+
+
+def create_revocation_list() -> RevocationList:
+    if settings.ACCESS_TOKEN_REVOCATION_URL:
+        if redis is None:
+            raise RuntimeError(
+                "ACCESS_TOKEN_REVOCATION_URL requires the 'redis' package"
+            )
+        return RevocationList(
+            SharedRevocationTransport(
+                redis.from_url(settings.ACCESS_TOKEN_REVOCATION_URL)
+            )
+        )
+    return RevocationList(LocalRevocationTransport())
+
+
+revocations = create_revocation_list()
+metrics.gauges.add(
+    "auth_revoked_access_tokens",
+    "Unexpired revoked access tokens held in memory",
+    lambda: len(revocations),
+)
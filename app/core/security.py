@@ -1,41 +1,95 @@
-from datetime import datetime, timedelta
+import base64
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Annotated, Optional
-from fastapi import Depends
+from fastapi import BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBasic,
+    HTTPBasicCredentials,
+    HTTPBearer,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import mailer, metrics
 from app.core.config import settings
-from app.db import models, crud
-from app.db.database import get_db
-from app.utils import rsa
+from app.core.hashing import hasher, pwd_context
+from app.core.keys import key_store
+from app.core.revocation import revocations
+from app.db import models, crud, schemas
+from app.db.database import async_session, get_db
+from app.utils.cache import TTLCache
+from app.utils.ids import uuid7
 from app.utils.exception import ServerException
 
+logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(**settings.CRYPTO_CONTEXT.config_dict)
 
-JWT_PRIVATE_KEY, JWT_PUBLIC_KEY = rsa.load_rsa_keys()
+verified_tokens = TTLCache(max_size=settings.VERIFIED_TOKEN_CACHE_SIZE)
+metrics.caches.add("verified_tokens", verified_tokens.stats)
+# A reload may retire a key, tokens it signed must not stay verified.
+key_store.on_reload(verified_tokens.clear)
 
 
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hasher.verify(plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
 
+async def get_password_hash(password: str) -> str:
+    return await hasher.hash(password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-async def authenticate_user(db: AsyncSession, username_or_email: str, password: str):
-    user = await crud.get_user_by_username(db, username_or_email)
-    if not user:
-        user = await crud.get_user_by_email(db, username_or_email)
+async def upgrade_password_hash(user_id: uuid.UUID, old_hash: str, password: str):
+    try:
+        new_hash = await get_password_hash(password)
+        async with async_session() as db:
+            upgraded = await crud.update_password_hash(db, user_id, old_hash, new_hash)
+    except Exception:
+        # The old hash keeps working, the next login retries.
+        logger.exception("Password hash upgrade failed for user %s", user_id)
+        return
+    if upgraded:
+        metrics.PASSWORD_REHASH.inc()
+
+
+async def authenticate_user(
+    db: AsyncSession,
+    username_or_email: str,
+    password: str,
+    background_tasks: Optional[BackgroundTasks] = None,
+):
+    user = await crud.get_user_by_login(db, username_or_email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    hashed_password = await crud.get_hashed_password(db, user)
+    if not hashed_password or not await verify_password(password, hashed_password):
         return False
+    # Verify and re-hash separately (not verify_and_update) so the second,
+    # equally expensive hash runs after the response is sent.
+    if background_tasks is not None and pwd_context.needs_update(hashed_password):
+        background_tasks.add_task(
+            upgrade_password_hash, user.id, hashed_password, password
+        )
     return user
 
+def sign_token(claims: dict) -> str:
+    keys = key_store.get()
+    started_at = time.perf_counter()
+    encoded_jwt = jwt.encode(
+        claims,
+        keys.signing_key,
+        algorithm=keys.algorithm,
+        headers={"kid": keys.kid},
+    )
+    metrics.jwt_sign_seconds.observe(time.perf_counter() - started_at)
+    return encoded_jwt
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -45,12 +99,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_PRIVATE_KEY, algorithm=settings.ALGORITHM)
+    to_encode.update({"exp": expire, "jti": str(uuid7())})
+    encoded_jwt = sign_token(to_encode)
 
     return encoded_jwt
 
 
+def create_user_access_token(user: models.User) -> str:
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": str(user.id),
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+            "ver": user.token_version or 0,
+        },
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -61,35 +128,238 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
         )
         
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, JWT_PRIVATE_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = sign_token(to_encode)
 
     return encoded_jwt
 
 
 def verify_token(token: str) -> dict:
-    try:
-        payload = jwt.decode(token, JWT_PUBLIC_KEY, algorithms=[settings.ALGORITHM])
+    keys = key_store.get()
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(digest)
+    if payload is not None:
+        if revocations.is_revoked(payload.get("jti")):
+            ServerException.could_not_validate_credentials()
         return payload
+
+    started_at = time.perf_counter()
+    try:
+        # Tokens issued before kid headers were added belong to the signing key.
+        kid = jwt.get_unverified_header(token).get("kid", keys.kid)
+        entry = keys.verifying_keys.get(kid)
+        if entry is None:
+            ServerException.could_not_validate_credentials()
+        key, algorithm = entry
+        payload = jwt.decode(token, key, algorithms=[algorithm])
     except JWTError:
-        ServerException.could_not_validate_credentials
+        ServerException.could_not_validate_credentials()
+    finally:
+        metrics.jwt_verify_seconds.observe(time.perf_counter() - started_at)
 
+    if revocations.is_revoked(payload.get("jti")):
+        ServerException.could_not_validate_credentials()
+    # Refresh tokens are single-use, caching them would only evict access tokens.
+    if payload.get("type") != "refresh" and payload.get("exp"):
+        verified_tokens.set(digest, payload, expires_at=payload["exp"])
+    return payload
 
-async def verify_refresh_token(db: AsyncSession, token: str):
+
+async def revoke_access_token(db: AsyncSession, token: str) -> None:
+    # An expired or invalid token is already unusable, revoking it is a no-op.
     try:
         payload = verify_token(token)
-        user_id: int = int(payload.get("sub"))
-        token_id: int = int(payload.get("token_id"))
+    except HTTPException:
+        return
+    if payload.get("type") == "refresh" or not payload.get("jti"):
+        return
+    try:
+        jti = uuid.UUID(payload["jti"])
+    except (TypeError, ValueError):
+        ServerException.could_not_validate_credentials()
+    await crud.revoke_access_token(
+        db, jti, expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    )
 
-        if user_id is None:
-            ServerException.verify_token_error()
-        db_token = await crud.get_refresh_token(db, token_id)
-        if not db_token or not db_token.is_active:
-            ServerException.verify_token_error()
 
-        return db_token
-    except JWTError:
+PASSWORD_RESET_TOKEN_TYPE = "password_reset"
+
+
+def password_fingerprint(hashed_password: str) -> str:
+    # Changes with every new hash, which retires reset tokens issued before.
+    # The hash's random salt keeps it useless for guessing the password.
+    digest = hashlib.sha256(hashed_password.encode()).digest()[:16]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def create_password_reset_token(user: models.User, hashed_password: str) -> str:
+    # No "sub" claim, so the token never passes as an access token.
+    return sign_token(
+        {
+            "uid": str(user.id),
+            "fp": password_fingerprint(hashed_password),
+            "type": PASSWORD_RESET_TOKEN_TYPE,
+            "exp": datetime.utcnow()
+            + timedelta(minutes=settings.PASSWORD_RESET_EXPIRE_MINUTES),
+        }
+    )
+
+
+async def send_password_reset(email: str) -> None:
+    try:
+        async with async_session() as db:
+            user = await crud.get_user_by_email(db, email)
+            if user is None or not user.is_active:
+                return
+            hashed_password = await crud.get_hashed_password(db, user)
+            if not hashed_password:
+                return
+            token = create_password_reset_token(user, hashed_password)
+            subject, body = mailer.password_reset_message(user.username, token)
+            await crud.send_email(db, user.email, subject, body)
+    except Exception:
+        logger.exception("Password reset email could not be queued")
+
+
+async def reset_password(db: AsyncSession, token: str, new_password: str) -> None:
+    try:
+        payload = verify_token(token)
+        if payload.get("type") != PASSWORD_RESET_TOKEN_TYPE:
+            ServerException.invalid_reset_token()
+        user_id = uuid.UUID(payload["uid"])
+    except (HTTPException, KeyError, TypeError, ValueError):
+        ServerException.invalid_reset_token()
+
+    user = await crud.get_user_by_id(db, user_id)
+    if user is None or not user.is_active:
+        ServerException.invalid_reset_token()
+    hashed_password = await crud.get_hashed_password(db, user)
+    if not hashed_password or not hmac.compare_digest(
+        password_fingerprint(hashed_password), str(payload.get("fp", ""))
+    ):
+        ServerException.invalid_reset_token()
+
+    new_hash = await get_password_hash(new_password)
+    if not await crud.set_password(db, user.id, hashed_password, new_hash):
+        ServerException.invalid_reset_token()
+
+
+# One cache per calling service, so a busy caller cannot evict another's entries.
+introspection_caches: dict[str, TTLCache] = {}
+
+
+def introspection_client(
+    credentials: Annotated[HTTPBasicCredentials, Depends(HTTPBasic())],
+) -> str:
+    # Client secrets are random, so a plain digest is enough to store them.
+    expected = settings.INTROSPECTION_CLIENTS.get(credentials.username, "")
+    digest = hashlib.sha256(credentials.password.encode()).hexdigest()
+    if not hmac.compare_digest(digest, expected):
+        ServerException.invalid_client()
+    return credentials.username
+
+
+def _introspection_cache(client_id: str) -> TTLCache:
+    cache = introspection_caches.get(client_id)
+    if cache is None:
+        cache = introspection_caches[client_id] = TTLCache(
+            max_size=settings.INTROSPECTION_CACHE_SIZE
+        )
+        metrics.caches.add(f"introspection:{client_id}", cache.stats)
+    return cache
+
+
+def _introspection_result(payload: dict, user) -> dict:
+    if (
+        user is None
+        or not user.is_active
+        or payload.get("ver", 0) != user.token_version
+    ):
+        return {"active": False}
+    return {
+        "active": True,
+        "token_type": "Bearer",
+        "sub": payload["sub"],
+        "uid": user.id,
+        "is_superuser": user.is_superuser,
+        "exp": payload["exp"],
+        "jti": payload.get("jti"),
+    }
+
+
+async def introspect_tokens(
+    db: AsyncSession, client_id: str, tokens: list[str]
+) -> list[dict]:
+    cache = _introspection_cache(client_id)
+    results: list[Optional[dict]] = [None] * len(tokens)
+    pending: list[tuple[int, bytes, dict]] = []
+
+    for index, token in enumerate(tokens):
+        digest = hashlib.sha256(token.encode()).digest()
+        cached = cache.get(digest)
+        if cached is not None:
+            payload, result = cached
+            if result["active"] and revocations.is_revoked(payload.get("jti")):
+                result = {"active": False}
+            results[index] = result
+            continue
+        try:
+            payload = verify_token(token)
+        except HTTPException:
+            results[index] = {"active": False}
+            continue
+        if payload.get("type") == "refresh" or not payload.get("sub"):
+            results[index] = {"active": False}
+            continue
+        pending.append((index, digest, payload))
+
+    if pending:
+        # Tokens issued before the uid claim are matched by username.
+        ids, usernames = set(), set()
+        for _, _, payload in pending:
+            try:
+                ids.add(uuid.UUID(payload["uid"]))
+            except (KeyError, TypeError, ValueError):
+                usernames.add(payload["sub"])
+        rows = await crud.get_users(db, list(ids), list(usernames))
+        by_id = {row.id: row for row in rows}
+        by_username = {row.username: row for row in rows}
+
+        for index, digest, payload in pending:
+            try:
+                user = by_id.get(uuid.UUID(payload["uid"]))
+            except (KeyError, TypeError, ValueError):
+                user = by_username.get(payload["sub"])
+            if user is not None and user.username != payload["sub"]:
+                user = None
+            result = _introspection_result(payload, user)
+            results[index] = result
+            # Entries end at exp, or sooner so user changes are picked up.
+            expires_at = min(
+                payload["exp"], time.time() + settings.INTROSPECTION_CACHE_TTL_SECONDS
+            )
+            cache.set(digest, (payload, result), expires_at=expires_at)
+
+    return results
+
+
+def get_refresh_token_id(token: str) -> uuid.UUID:
+    payload = verify_token(token)
+    if payload.get("type") != "refresh":
+        ServerException.invalid_refresh_token()
+    try:
+        return uuid.UUID(payload["token_id"])
+    except (KeyError, TypeError, ValueError):
+        ServerException.invalid_refresh_token()
+
+
+async def verify_refresh_token(db: AsyncSession, token: str):
+    token_id = get_refresh_token_id(token)
+    db_token = await crud.get_refresh_token(db, token_id)
+    if not db_token or not db_token.is_active:
         ServerException.verify_token_error()
 
+    return db_token
+
 
 async def validate_token(
     token: str, db: AsyncSession, token_type: str = "access"
@@ -108,12 +378,8 @@ async def validate_token(
     return user
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
-    db: AsyncSession = Depends(get_db),
-) -> models.User:
+async def user_from_token(db: AsyncSession, token: str) -> models.User:
     try:
-        token = credentials.credentials
         payload = verify_token(token)
         username: str = payload.get("sub")
         if username is None:
@@ -123,13 +389,56 @@ async def get_current_user(
     user = await crud.get_user_by_username(db, username=username)
     if user is None:
         ServerException.credentials_exception()
+    if payload.get("ver", 0) != user.token_version:
+        ServerException.credentials_exception()
 
     return user
 
 
-async def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    db: AsyncSession = Depends(get_db),
 ) -> models.User:
+    return await user_from_token(db, credentials.credentials)
+
+
+def token_version_jti(user_id: uuid.UUID, version: int) -> uuid.UUID:
+    # Stands for every access token of a user issued with this token_version.
+    return uuid.uuid5(user_id, str(version))
+
+
+def user_from_claims(payload: dict) -> schemas.TokenUser:
+    if payload.get("type") == "refresh":
+        ServerException.credentials_exception()
+    try:
+        user = schemas.TokenUser(
+            id=uuid.UUID(payload["uid"]),
+            username=payload["sub"],
+            is_active=payload["is_active"],
+            is_superuser=payload["is_superuser"],
+            token_version=payload["ver"],
+        )
+    except (KeyError, TypeError, ValueError):
+        ServerException.credentials_exception()
+    # A version bump (password change, deactivation, session revocation) is
+    # published through the revocation list, shared by every worker.
+    if revocations.is_revoked(str(token_version_jti(user.id, user.token_version))):
+        ServerException.credentials_exception()
+    return user
+
+
+async def get_current_principal(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    db: AsyncSession = Depends(get_db),
+) -> models.User | schemas.TokenUser:
+    if settings.STATELESS_ACCESS_TOKENS:
+        return user_from_claims(verify_token(credentials.credentials))
+    return await get_current_user(credentials, db)
+
+
+async def get_current_active_user(
+    current_user: models.User = Depends(get_current_principal),
+) -> models.User | schemas.TokenUser:
     if not current_user.is_active:
         ServerException.inactive_user()
 
@@ -142,3 +451,81 @@ async def is_superuser(
     if not current_user.is_superuser:
         ServerException.not_superuser()
     return True
+
+
+async def principal_from_token(
+    token: str, session_factory=async_session
+) -> models.User | schemas.TokenUser:
+    if settings.STATELESS_ACCESS_TOKENS:
+        return user_from_claims(verify_token(token))
+    # The session only checks out a connection on a user cache miss.
+    async with session_factory() as db:
+        return await user_from_token(db, token)
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and credentials:
+                return credentials
+            return None
+    return None
+
+
+class BearerAuthMiddleware:
+    # Verifies the bearer token once, before routing, for every path under one
+    # of the prefixes, and stores the principal in scope["user"].
+    def __init__(self, app, paths: list[str], session_factory=async_session):
+        self.app = app
+        self.paths = tuple(path.rstrip("/") for path in paths)
+        self.session_factory = session_factory
+
+    def _protected(self, path: str) -> bool:
+        return any(
+            path == prefix or path.startswith(prefix + "/") for prefix in self.paths
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._protected(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        try:
+            if token is None:
+                ServerException.credentials_exception()
+            scope["user"] = await principal_from_token(token, self.session_factory)
+        except HTTPException as e:
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers=e.headers
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+async def get_request_active_user(request: Request) -> models.User | schemas.TokenUser:
+    current_user = request.scope.get("user")
+    if current_user is None:
+        ServerException.credentials_exception()
+    if not current_user.is_active:
+        ServerException.inactive_user()
+    return current_user
+
+
+async def get_request_superuser(request: Request) -> bool:
+    current_user = await get_request_active_user(request)
+    if not current_user.is_superuser:
+        ServerException.not_superuser()
+    return True
+
+
+# Routes depend on these. With AUTH_MIDDLEWARE the principal is already in the
+# request scope, so no bearer parsing or database session per route.
+if settings.AUTH_MIDDLEWARE:
+    current_active_user = get_request_active_user
+    current_superuser = get_request_superuser
+else:
+    current_active_user = get_current_active_user
+    current_superuser = is_superuser
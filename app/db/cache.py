@@ -0,0 +1,248 @@
+import json
+import time
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import models
+from app.utils.cache import TTLCache
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+# The password hash stays out of every backend; crud.get_hashed_password reads
+# it from the row on the paths that verify or replace a password.
+USER_COLUMNS = tuple(
+    attr.key
+    for attr in inspect(models.User).column_attrs
+    if attr.key != "hashed_password"
+)
+
+
+def _id_key(user_id: Any) -> str:
+    return f"user:id:{user_id}"
+
+
+def _username_key(username: str) -> str:
+    return f"user:username:{username}"
+
+
+def _email_key(email: str) -> str:
+    return f"user:email:{email}"
+
+
+class LocalUserCacheBackend:
+    def __init__(self, max_size: int, ttl: float):
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+
+    @property
+    def evictions(self) -> int:
+        return self._entries.evictions
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    async def set(self, items: dict[str, Any]) -> None:
+        for key, value in items.items():
+            self._entries.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class SharedUserCacheBackend:
+    # Works with any redis-compatible asyncio client (get / set(ex=) / delete).
+    def __init__(self, client: Any, ttl: float, prefix: str = "auth:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, items: dict[str, Any]) -> None:
+        for key, value in items.items():
+            await self.client.set(
+                self.prefix + key, json.dumps(value, default=str), ex=int(self.ttl)
+            )
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        pass
+
+
+class FakeSharedCacheClient:
+    # In-process stand-in for a shared cache server, used for local runs and tests.
+    def __init__(self):
+        self._data: dict[str, tuple[Optional[float], str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        self._data[key] = (time.time() + ex if ex else None, value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+class UserCache:
+    def __init__(self, backend: Optional[Any]):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_by_id(self, db: AsyncSession, user_id: Any) -> Optional[models.User]:
+        if self.backend is None:
+            return None
+        return await self._resolve(db, await self.backend.get(_id_key(user_id)))
+
+    async def get_by_username(
+        self, db: AsyncSession, username: str
+    ) -> Optional[models.User]:
+        return await self._get_by_alias(db, _username_key(username), "username", username)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[models.User]:
+        return await self._get_by_alias(db, _email_key(email), "email", email)
+
+    async def get_by_login(self, db: AsyncSession, login: str) -> Optional[models.User]:
+        if self.backend is None:
+            return None
+        user_id = await self.backend.get(_username_key(login))
+        field = "username"
+        if user_id is None:
+            user_id = await self.backend.get(_email_key(login))
+            field = "email"
+        if user_id is None:
+            self.misses += 1
+            return None
+        snapshot = await self.backend.get(_id_key(user_id))
+        if snapshot is not None and snapshot[field] != login:
+            snapshot = None
+        return await self._resolve(db, snapshot)
+
+    async def set(self, user: models.User) -> None:
+        if self.backend is None:
+            return
+        snapshot = {column: getattr(user, column) for column in USER_COLUMNS}
+        user_id = str(user.id)
+        await self.backend.set(
+            {
+                _id_key(user_id): snapshot,
+                _username_key(user.username): user_id,
+                _email_key(user.email): user_id,
+            }
+        )
+
+    async def invalidate(
+        self,
+        user_id: Any = None,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> None:
+        if self.backend is None:
+            return
+        keys = []
+        if user_id is not None:
+            keys.append(_id_key(user_id))
+            snapshot = await self.backend.get(_id_key(user_id))
+            if snapshot is not None:
+                keys.append(_username_key(snapshot["username"]))
+                keys.append(_email_key(snapshot["email"]))
+        if username is not None:
+            keys.append(_username_key(username))
+        if email is not None:
+            keys.append(_email_key(email))
+        await self.backend.delete(*keys)
+
+    async def clear(self) -> None:
+        if self.backend is not None:
+            await self.backend.clear()
+
+    def stats(self) -> dict:
+        stats = {"hits": self.hits, "misses": self.misses}
+        # A shared server evicts on its own, nothing is counted in process.
+        if isinstance(self.backend, LocalUserCacheBackend):
+            stats["evictions"] = self.backend.evictions
+        return stats
+
+    async def _get_by_alias(
+        self, db: AsyncSession, key: str, field: str, value: str
+    ) -> Optional[models.User]:
+        if self.backend is None:
+            return None
+        user_id = await self.backend.get(key)
+        if user_id is None:
+            self.misses += 1
+            return None
+        snapshot = await self.backend.get(_id_key(user_id))
+        # An alias may outlive a rename, only trust it if the entry still agrees.
+        if snapshot is not None and snapshot[field] != value:
+            snapshot = None
+        return await self._resolve(db, snapshot)
+
+    async def _resolve(
+        self, db: AsyncSession, snapshot: Optional[dict]
+    ) -> Optional[models.User]:
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        user = models.User(**snapshot)
+        if not isinstance(user.id, uuid.UUID):
+            user.id = uuid.UUID(user.id)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+
+def create_user_cache() -> UserCache:
+    if settings.USER_CACHE_BACKEND == "local":
+        return UserCache(
+            LocalUserCacheBackend(
+                max_size=settings.USER_CACHE_MAX_SIZE,
+                ttl=settings.USER_CACHE_TTL_SECONDS,
+            )
+        )
+    if settings.USER_CACHE_BACKEND == "shared":
+        if settings.USER_CACHE_URL:
+            if redis is None:
+                raise RuntimeError("USER_CACHE_URL requires the 'redis' package")
+            client = redis.from_url(settings.USER_CACHE_URL)
+        else:
+            client = FakeSharedCacheClient()
+        return UserCache(
+            SharedUserCacheBackend(client, ttl=settings.USER_CACHE_TTL_SECONDS)
+        )
+    return UserCache(None)
+
+
+user_cache = create_user_cache()
+metrics.caches.add("users", user_cache.stats)
@@ -1,59 +1,364 @@
-from datetime import datetime, timedelta
-from sqlalchemy import desc, select
-from app.core import security
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import (
+    delete,
+    desc,
+    exists,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from app.core import mailer, metrics, security
+from app.core.revocation import revocations
 from app.db import models, schemas
+from app.db.cache import user_cache
+from app.utils.ids import uuid7
+from app.utils.exception import ServerException
 from app.core.config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import UUID4
 from typing import Optional
 
 
-async def get_user_by_username(db: AsyncSession, username: str):
+async def _load_user(db: AsyncSession, criterion):
+    # Set-based UPDATEs skip session synchronisation, so an instance already in
+    # the identity map must be refreshed from the row before it is cached.
     result = await db.execute(
-        select(models.User).filter(models.User.username == username)
+        select(models.User)
+        .filter(criterion)
+        .execution_options(populate_existing=True)
     )
-    return result.scalar_one_or_none()
+    user = result.scalar_one_or_none()
+    if user is not None:
+        await user_cache.set(user)
+    return user
+
+
+@metrics.timed_query
+async def get_user_by_username(db: AsyncSession, username: str):
+    user = await user_cache.get_by_username(db, username)
+    if user is None:
+        user = await _load_user(db, models.User.username == username)
+    return user
 
 
+@metrics.timed_query
 async def get_user_by_id(db: AsyncSession, id: UUID4):
+    user = await user_cache.get_by_id(db, id)
+    if user is None:
+        user = await _load_user(db, models.User.id == id)
+    return user
+
+
+@metrics.timed_query
+async def get_user_by_email(db: AsyncSession, email: str):
+    user = await user_cache.get_by_email(db, email)
+    if user is None:
+        user = await _load_user(db, models.User.email == email)
+    return user
+
+
+@metrics.timed_query
+async def get_user_by_login(db: AsyncSession, login: str):
+    user = await user_cache.get_by_login(db, login)
+    if user is not None:
+        return user
+
+    # Both columns are uniquely indexed, so this resolves in one round trip;
+    # a username match wins over an email match.
     result = await db.execute(
-        select(models.User).filter(models.User.id == id)
+        select(models.User)
+        .filter(or_(models.User.username == login, models.User.email == login))
+        .order_by(desc(models.User.username == login))
+        .limit(1)
     )
-    return result.scalar_one_or_none()
+    user = result.scalars().first()
+    if user is not None:
+        await user_cache.set(user)
+    return user
 
 
-async def get_user_by_email(db: AsyncSession, email: str):
+@metrics.timed_query
+async def get_hashed_password(db: AsyncSession, user: models.User) -> Optional[str]:
+    # Users served from the cache come without the hash.
+    if "hashed_password" not in inspect(user).unloaded:
+        return user.hashed_password
     result = await db.execute(
-        select(models.User).filter(models.User.email == email)
+        select(models.User.hashed_password).where(models.User.id == user.id)
     )
     return result.scalar_one_or_none()
 
 
+USER_EXPORT_COLUMNS = (
+    models.User.id,
+    models.User.username,
+    models.User.email,
+    models.User.is_active,
+    models.User.is_superuser,
+    models.User.email_verified,
+    models.User.token_version,
+)
+
+
+@metrics.timed_query
+async def get_users(db: AsyncSession, ids: list[UUID4], usernames: list[str]):
+    conditions = []
+    if ids:
+        conditions.append(models.User.id.in_(ids))
+    if usernames:
+        conditions.append(models.User.username.in_(usernames))
+    if not conditions:
+        return []
+    result = await db.execute(select(*USER_EXPORT_COLUMNS).where(or_(*conditions)))
+    return result.all()
+
+
+async def stream_users(
+    db: AsyncSession,
+    batch_size: int,
+    is_active: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    is_superuser: Optional[bool] = None,
+):
+    query = select(*USER_EXPORT_COLUMNS).order_by(models.User.id)
+    for column, value in (
+        (models.User.is_active, is_active),
+        (models.User.email_verified, email_verified),
+        (models.User.is_superuser, is_superuser),
+    ):
+        if value is not None:
+            query = query.where(column.is_(value))
+
+    # stream() keeps a server-side cursor open and yield_per bounds how many
+    # rows are buffered, so memory does not grow with the table.
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
+
+
+@metrics.timed_query
 async def create_user(db: AsyncSession, user: schemas.UserCreate):
-    hashed_password = security.get_password_hash(user.password)
-    db_user = models.User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        is_active=True,
+    # One indexed lookup turns away taken names before paying for the hash;
+    # the INSERT below still maps a concurrent registration to the same errors.
+    result = await db.execute(
+        select(models.User.username).where(
+            or_(models.User.username == user.username, models.User.email == user.email)
+        )
     )
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
+    taken = result.scalars().all()
+    if user.username in taken:
+        ServerException.username_already_registered()
+    if taken:
+        ServerException.email_already_registered()
+
+    hashed_password = await security.get_password_hash(user.password)
+    try:
+        result = await db.execute(
+            insert(models.User)
+            .values(
+                username=user.username,
+                email=user.email,
+                hashed_password=hashed_password,
+                is_active=True,
+            )
+            .returning(models.User)
+        )
+        db_user = result.scalar_one()
+        # Queued in the same transaction, the dispatcher delivers it later.
+        code = await create_email_code(db, db_user.id)
+        subject, body = mailer.verification_message(db_user.username, code)
+        await enqueue_email(db, db_user.email, subject, body)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # The first line names the violated constraint without echoing values.
+        if "email" in str(e.orig).splitlines()[0]:
+            ServerException.email_already_registered()
+        ServerException.username_already_registered()
+
+    await user_cache.invalidate(db_user.id, username=user.username, email=user.email)
     return db_user
 
 
+_INSERT_BY_DIALECT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@metrics.timed_query
+async def insert_users(db: AsyncSession, rows: list[dict]) -> set[str]:
+    # One multi-row INSERT per batch; rows clashing with an existing username
+    # or email (or an earlier row of the batch) are skipped, and only the
+    # inserted usernames come back.
+    dialect_insert = _INSERT_BY_DIALECT[db.bind.dialect.name]
+    result = await db.execute(
+        dialect_insert(models.User)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(models.User.username)
+    )
+    inserted = set(result.scalars().all())
+    await db.commit()
+    return inserted
+
+
+@metrics.timed_query
+async def set_password(
+    db: AsyncSession, user_id: UUID4, old_hash: str, new_hash: str
+) -> bool:
+    # Compare-and-set on the old hash makes a reset token or a concurrent
+    # change single-use. Every session and access token is retired with it.
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.hashed_password == old_hash)
+        .values(hashed_password=new_hash, token_version=models.User.token_version + 1)
+        .returning(models.User.id, models.User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    if len(rows) != 1:
+        await db.rollback()
+        return False
+    await _revoke_sessions(db, [user_id])
+    retired = await _retire_token_versions(db, rows)
+    await db.commit()
+    await _publish_revocations(retired)
+    await user_cache.invalidate(user_id)
+    return True
+
+
+@metrics.timed_query
+async def update_password_hash(
+    db: AsyncSession, user_id: UUID4, old_hash: str, new_hash: str
+) -> bool:
+    # Compare-and-set: a password changed since old_hash was read wins.
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await user_cache.invalidate(user_id)
+    return result.rowcount == 1
+
+
+async def stream_password_hashes(db: AsyncSession, batch_size: int):
+    result = await db.stream(
+        select(models.User.hashed_password).execution_options(yield_per=batch_size)
+    )
+    async for hashes in result.scalars().partitions():
+        yield hashes
+
+
+@metrics.timed_query
+async def set_user_active(
+    db: AsyncSession, user_id: UUID4, is_active: bool
+) -> bool:
+    # The version bump retires outstanding access tokens, deactivation also
+    # revokes every refresh token.
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(is_active=is_active, token_version=models.User.token_version + 1)
+        .returning(models.User.id, models.User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    if len(rows) != 1:
+        await db.rollback()
+        return False
+    if not is_active:
+        await _revoke_sessions(db, [user_id])
+    retired = await _retire_token_versions(db, rows)
+    await db.commit()
+    await _publish_revocations(retired)
+    await user_cache.invalidate(user_id)
+    return True
+
+
+async def _revoke_sessions(
+    db: AsyncSession,
+    user_ids: list[UUID4],
+    except_token_id: Optional[UUID4] = None,
+) -> int:
+    query = (
+        update(models.RefreshToken)
+        .where(models.RefreshToken.user_id.in_(user_ids))
+        .where(models.RefreshToken.is_active)
+    )
+    if except_token_id is not None:
+        query = query.where(models.RefreshToken.id != except_token_id)
+    result = await db.execute(
+        query.values(is_active=False, revoked_at=func.now()).execution_options(
+            synchronize_session=False
+        )
+    )
+    return result.rowcount
+
+
+@metrics.timed_query
+async def revoke_sessions(
+    db: AsyncSession,
+    user_ids: list[UUID4],
+    except_token_id: Optional[UUID4] = None,
+) -> int:
+    # One UPDATE for the refresh tokens and one for the token versions, so
+    # outstanding access tokens of every affected user stop validating too.
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return 0
+    revoked = await _revoke_sessions(db, user_ids, except_token_id)
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id.in_(user_ids))
+        .values(token_version=models.User.token_version + 1)
+        .returning(models.User.id, models.User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    retired = await _retire_token_versions(db, result.all())
+    await db.commit()
+    await _publish_revocations(retired)
+    for user_id in user_ids:
+        await user_cache.invalidate(user_id)
+    return revoked
+
+
+def _encode_refresh_token(
+    user_id: UUID4, token_id: UUID4, expires_delta: Optional[timedelta] = None
+) -> str:
+    token_data = {
+        "sub": str(user_id),
+        "token_id": str(token_id),
+        "type": "refresh",
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    return security.create_refresh_token(data=token_data, expires_delta=expires_delta)
+
+
+@metrics.timed_query
 async def create_refresh_token(
     db: AsyncSession,
     user_id: UUID4,
     expires_delta: Optional[timedelta] = None,
     previous_token_id: Optional[UUID4] = None, 
 ) -> tuple[str, models.RefreshToken]:
-    expires_at = datetime.utcnow() + (
+    expires_at = datetime.now(timezone.utc) + (
         expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
 
+    # The id is generated here, so the token is signed before the row exists.
+    token_id = uuid7()
+    token = _encode_refresh_token(user_id, token_id, expires_delta)
+
     db_token = models.RefreshToken(
+        id=token_id,
         user_id=user_id,
         expires_at=expires_at,
         is_active=True,
@@ -61,20 +366,89 @@ async def create_refresh_token(
     )
     db.add(db_token)
     await db.commit()
-    await db.refresh(db_token)
 
-    token_data = {
-        "sub": str(user_id),
-        "token_id": str(db_token.id),
-        "type": "refresh",
-        "created_at": datetime.utcnow().isoformat(),
-    }
+    return token, db_token
 
-    token = security.create_refresh_token(data=token_data, expires_delta=expires_delta)
 
-    return token, db_token
+@metrics.timed_query
+async def rotate_refresh_token(
+    db: AsyncSession,
+    token_id: UUID4,
+    expires_delta: Optional[timedelta] = None,
+):
+    # Only one concurrent rotation of the same token can match is_active here.
+    result = await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == token_id)
+        .where(models.RefreshToken.is_active)
+        .where(models.RefreshToken.expires_at > func.now())
+        .values(is_active=False, revoked_at=func.now())
+        .returning(models.RefreshToken.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    user_id = result.scalar_one_or_none()
+
+    if user_id is None:
+        await _revoke_reused_token_family(db, token_id)
+        await db.commit()
+        ServerException.invalid_refresh_token()
+
+    user = await get_user_by_id(db, user_id)
+    if user is None or not user.is_active:
+        await db.commit()
+        ServerException.inactive_user()
+
+    expires_at = datetime.now(timezone.utc) + (
+        expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    new_token_id = uuid7()
+    token = _encode_refresh_token(user.id, new_token_id, expires_delta)
+    await db.execute(
+        insert(models.RefreshToken).values(
+            id=new_token_id,
+            user_id=user.id,
+            expires_at=expires_at,
+            is_active=True,
+            previous_token_id=token_id,
+        )
+    )
+    await db.commit()
+    metrics.REFRESH_ROTATIONS.inc()
+
+    return token, user
+
+
+async def _revoke_reused_token_family(db: AsyncSession, token_id: UUID4) -> int:
+    # A revoked token that already has a successor was rotated before, so
+    # presenting it again means it leaked: revoke every session of its owner.
+    successor = aliased(models.RefreshToken)
+    result = await db.execute(
+        select(models.RefreshToken.user_id)
+        .where(models.RefreshToken.id == token_id)
+        .where(models.RefreshToken.is_active.is_(False))
+        .where(exists().where(successor.previous_token_id == token_id))
+    )
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        return 0
+    metrics.REFRESH_TOKEN_REUSE.inc()
+
+    revoked = await _revoke_sessions(db, [user_id])
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(token_version=models.User.token_version + 1)
+        .returning(models.User.id, models.User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    retired = await _retire_token_versions(db, result.all())
+    await db.commit()
+    await _publish_revocations(retired)
+    await user_cache.invalidate(user_id)
+    return revoked
 
 
+@metrics.timed_query
 async def get_refresh_token(db: AsyncSession, id: UUID4):
     result = await db.execute(
         select(models.RefreshToken).filter(models.RefreshToken.id == id)
@@ -82,32 +456,272 @@ async def get_refresh_token(db: AsyncSession, id: UUID4):
     return result.scalar_one_or_none()
 
 
+@metrics.timed_query
 async def revoke_refresh_token_by_id(db: AsyncSession, token_id: UUID4):
     result = await db.execute(
-        select(models.RefreshToken).where(models.RefreshToken.id == token_id)
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == token_id)
+        .values(
+            is_active=False,
+            revoked_at=func.coalesce(models.RefreshToken.revoked_at, func.now()),
+        )
+        .returning(models.RefreshToken)
+        .execution_options(synchronize_session=False)
     )
-    db_token = result.scalar_one()
-    db_token.is_active = False
+    db_token = result.scalar_one_or_none()
     await db.commit()
-    await db.refresh(db_token)
     return db_token
 
 
-async def get_refresh_tokens(db: AsyncSession, count: int, user_id: UUID4):
+@metrics.timed_query
+async def get_refresh_tokens(
+    db: AsyncSession,
+    user_id: UUID4,
+    limit: int,
+    after: Optional[tuple[datetime, UUID4]] = None,
+):
+    # Keyset paging on (created_at, id) walks the partial index from the
+    # cursor instead of skipping OFFSET rows, and only the listed columns are
+    # fetched.
+    query = (
+        select(
+            models.RefreshToken.id,
+            models.RefreshToken.created_at,
+            models.RefreshToken.expires_at,
+            models.RefreshToken.previous_token_id,
+        )
+        .where(models.RefreshToken.user_id == user_id)
+        .where(models.RefreshToken.is_active)
+        .order_by(desc(models.RefreshToken.created_at), desc(models.RefreshToken.id))
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(
+            tuple_(models.RefreshToken.created_at, models.RefreshToken.id)
+            < tuple_(*after)
+        )
+    result = await db.execute(query)
+    return result.all()
+
+
+@metrics.timed_query
+async def purge_refresh_tokens(
+    db: AsyncSession,
+    expired_before: datetime,
+    revoked_before: datetime,
+    limit: int,
+) -> int:
+    # Revoked rows are kept for the retention window after revocation so a
+    # replayed rotated token is still recognised as reuse rather than as an
+    # unknown token. Rows revoked before revoked_at existed wait for expiry.
     result = await db.execute(
-        select(models.RefreshToken)
-        .filter(models.RefreshToken.user_id == user_id)
-        .filter(models.RefreshToken.is_active)
-        .order_by(desc(models.RefreshToken.created_at))
-        .limit(count)
+        select(models.RefreshToken.id)
+        .where(
+            or_(
+                models.RefreshToken.expires_at < expired_before,
+                models.RefreshToken.revoked_at < revoked_before,
+            )
+        )
+        .limit(limit)
+        .with_for_update(skip_locked=True)
     )
-    return result.scalars().all()
+    token_ids = result.scalars().all()
+    if not token_ids:
+        return 0
 
-async def create_email_code(db: AsyncSession, user_id: UUID4):
-    db_ver = models.EmailTokens(
-        user_id=user_id
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.previous_token_id.in_(token_ids))
+        .values(previous_token_id=None)
+        .execution_options(synchronize_session=False)
     )
-    db.add(db_ver)
+    result = await db.execute(
+        delete(models.RefreshToken)
+        .where(models.RefreshToken.id.in_(token_ids))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _retire_token_versions(db: AsyncSession, rows) -> list[dict]:
+    # Stateless access tokens are never compared with token_version, so each
+    # bump revokes the version it replaced like a jti. It stays revoked until
+    # the last token issued with it has expired, counting tokens minted from
+    # a user cache entry that still held the old version.
+    if not settings.STATELESS_ACCESS_TOKENS or not rows:
+        return []
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        seconds=settings.USER_CACHE_TTL_SECONDS,
+    )
+    retired = [
+        {
+            "jti": security.token_version_jti(user_id, version - 1),
+            "expires_at": expires_at,
+        }
+        for user_id, version in rows
+    ]
+    await db.execute(insert(models.RevokedAccessToken), retired)
+    return retired
+
+
+async def _publish_revocations(retired: list[dict]) -> None:
+    for row in retired:
+        await revocations.revoke(str(row["jti"]), row["expires_at"].timestamp())
+
+
+@metrics.timed_query
+async def revoke_access_token(db: AsyncSession, jti: UUID4, expires_at: datetime):
+    db.add(models.RevokedAccessToken(jti=jti, expires_at=expires_at))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Already revoked, e.g. a repeated logout with the same token.
+        await db.rollback()
+    await revocations.revoke(str(jti), expires_at.timestamp())
+
+
+@metrics.timed_query
+async def get_revoked_access_tokens(
+    db: AsyncSession, now: datetime, revoked_since: Optional[datetime] = None
+):
+    query = select(
+        models.RevokedAccessToken.jti,
+        models.RevokedAccessToken.expires_at,
+        models.RevokedAccessToken.revoked_at,
+    ).where(models.RevokedAccessToken.expires_at > now)
+    if revoked_since is not None:
+        query = query.where(models.RevokedAccessToken.revoked_at >= revoked_since)
+    result = await db.execute(query)
+    return result.all()
+
+
+@metrics.timed_query
+async def purge_revoked_access_tokens(
+    db: AsyncSession, expired_before: datetime, limit: int
+) -> int:
+    result = await db.execute(
+        select(models.RevokedAccessToken.jti)
+        .where(models.RevokedAccessToken.expires_at < expired_before)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jtis = result.scalars().all()
+    if not jtis:
+        return 0
+
+    result = await db.execute(
+        delete(models.RevokedAccessToken)
+        .where(models.RevokedAccessToken.jti.in_(jtis))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+def _hash_email_code(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+async def create_email_code(db: AsyncSession, user_id: UUID4) -> str:
+    # Left to the caller to commit, so it lands with the row that needs it.
+    code = secrets.token_urlsafe(32)
+    await db.execute(
+        insert(models.EmailTokens).values(
+            user_id=user_id,
+            token_hash=_hash_email_code(code),
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(hours=settings.EMAIL_VERIFICATION_EXPIRE_HOURS),
+        )
+    )
+    return code
+
+
+@metrics.timed_query
+async def verify_email(db: AsyncSession, code: str) -> Optional[UUID4]:
+    # One lookup on the unique token_hash index picks the user and flags it.
+    code_owner = (
+        select(models.EmailTokens.user_id)
+        .where(
+            models.EmailTokens.token_hash == _hash_email_code(code),
+            models.EmailTokens.expires_at > datetime.now(timezone.utc),
+        )
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == code_owner)
+        .values(email_verified=True)
+        .returning(models.User.id)
+        .execution_options(synchronize_session=False)
+    )
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        return None
+
+    await db.execute(
+        delete(models.EmailTokens)
+        .where(models.EmailTokens.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await user_cache.invalidate(user_id)
+    return user_id
+
+
+async def enqueue_email(db: AsyncSession, recipient: str, subject: str, body: str):
+    await db.execute(
+        insert(models.EmailOutbox).values(
+            recipient=recipient, subject=subject, body=body
+        )
+    )
+
+
+@metrics.timed_query
+async def send_email(db: AsyncSession, recipient: str, subject: str, body: str):
+    await enqueue_email(db, recipient, subject, body)
+    await db.commit()
+
+
+@metrics.timed_query
+async def claim_outbox(db: AsyncSession, now: datetime, limit: int, lease: float):
+    # Claimed rows are pushed past the lease instead of being locked while
+    # they are sent; a dispatcher that dies mid-batch leaves them to retry.
+    due = (
+        select(models.EmailOutbox.id)
+        .where(models.EmailOutbox.next_attempt_at <= now)
+        .order_by(models.EmailOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(models.EmailOutbox)
+        .where(models.EmailOutbox.id.in_(due))
+        .values(next_attempt_at=now + timedelta(seconds=lease))
+        .returning(
+            models.EmailOutbox.id,
+            models.EmailOutbox.recipient,
+            models.EmailOutbox.subject,
+            models.EmailOutbox.body,
+            models.EmailOutbox.attempts,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    await db.commit()
+    return rows
+
+
+@metrics.timed_query
+async def complete_outbox(db: AsyncSession, sent_ids: list, failures: list[dict]):
+    if sent_ids:
+        await db.execute(
+            delete(models.EmailOutbox)
+            .where(models.EmailOutbox.id.in_(sent_ids))
+            .execution_options(synchronize_session=False)
+        )
+    if failures:
+        # Bulk UPDATE by primary key, one statement for the whole batch.
+        await db.execute(update(models.EmailOutbox), failures)
     await db.commit()
-    await db.refresh(db_ver)
-    return db_ver
@@ -1,19 +1,92 @@
+import time
+
+from sqlalchemy import exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 
+from app.core import metrics
 from app.core.config import settings
 
 database_url = str(settings.DATABASE_URL)
 
 
-engine = create_async_engine(database_url)
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait
+        if wait > self.wait_seconds_max:
+            self.wait_seconds_max = wait
+
+    def snapshot(self) -> dict:
+        return {
+            "checked_out": engine.pool.checkedout(),
+            "overflow": max(engine.pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "wait_seconds_avg": self.wait_seconds_total / (self.checkouts or 1),
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            metrics.db_pool_timeouts.inc()
+            raise
+        wait = time.perf_counter() - started_at
+        pool_stats.record_wait(wait)
+        metrics.DB_POOL_WAIT_SECONDS.observe(wait)
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        created = super()._inc_overflow()
+        if created and self.overflow() > 0:
+            pool_stats.overflow_events += 1
+            metrics.db_pool_overflows.inc()
+        return created
+
+
+engine = create_async_engine(
+    database_url,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
+metrics.gauges.add(
+    "auth_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    engine.pool.checkedout,
+)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+
 async def get_db():
+    # AsyncSession only checks a connection out of the pool on its first
+    # statement, so requests that never query do not touch the pool.
     async with async_session() as session:
         yield session
@@ -1,42 +1,101 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    Uuid,
+)
 import uuid
+from datetime import datetime, timezone
 from sqlalchemy.sql import func
 from .database import Base
+from app.utils.ids import uuid7
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(
-        UUID(as_uuid=True), 
-        default=uuid.uuid4, 
-        unique=True, 
-        primary_key=True, 
-        index=True
-    )
+    id = Column(Uuid, default=uuid.uuid4, primary_key=True)
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     email_verified = Column(Boolean, default=False)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     
 class EmailTokens(Base):
     __tablename__ = "email_codes"
-    
-    id = Column(int, unique=True, primary_key=True, index=True)
-    user_id = Column(UUID, ForeignKey(User.id))
-    token = Column(UUID)
+
+    id = Column(Uuid, default=uuid7, primary_key=True)
+    user_id = Column(Uuid, ForeignKey(User.id), nullable=False, index=True)
+    # sha256 of the emailed code, the code itself is never stored.
+    token_hash = Column(String(64), unique=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Uuid, default=uuid7, primary_key=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    # NULL once attempts are exhausted, the row is kept for inspection.
+    next_attempt_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    last_error = Column(Text)
 
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
-    id = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, primary_key=True, index=True)
-    user_id = Column(UUID, ForeignKey(User.id))
+    id = Column(Uuid, default=uuid7, primary_key=True)
+    user_id = Column(Uuid, ForeignKey(User.id))
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in-process so created_at has the same precision on every backend;
+    # session cursors round-trip it and compare it for equality.
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
     expires_at = Column(DateTime(timezone=True))
-    previous_token_id = Column(UUID, ForeignKey(id), nullable=True)
+    # Set by every revoke path; purge retention counts from here.
+    revoked_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    previous_token_id = Column(Uuid, ForeignKey(id), nullable=True, index=True)
+
+
+class RevokedAccessToken(Base):
+    __tablename__ = "revoked_access_tokens"
+
+    jti = Column(Uuid, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+
+
+Index(
+    "ix_refresh_tokens_user_active_created_id",
+    RefreshToken.user_id,
+    RefreshToken.created_at.desc(),
+    RefreshToken.id.desc(),
+    postgresql_where=RefreshToken.is_active,
+    sqlite_where=RefreshToken.is_active == True,  # noqa: E712
+)
+
+Index(
+    "ix_email_outbox_next_attempt_at",
+    EmailOutbox.next_attempt_at,
+    postgresql_where=EmailOutbox.next_attempt_at.isnot(None),
+    sqlite_where=EmailOutbox.next_attempt_at.isnot(None),
+)
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.mailer import build_message, mailer
+from app.db import crud
+from app.db.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+def _next_attempt(now: datetime, attempts: int) -> Optional[datetime]:
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        return None
+    return now + timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1)
+    )
+
+
+async def dispatch_outbox(batch_size: Optional[int] = None) -> int:
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    # No transport configured: rows stay pending until one is.
+    if mailer is None:
+        return 0
+
+    total = 0
+    while True:
+        now = datetime.now(timezone.utc)
+        async with async_session() as db:
+            rows = await crud.claim_outbox(
+                db, now, limit=batch_size, lease=settings.EMAIL_OUTBOX_LEASE_SECONDS
+            )
+        if not rows:
+            break
+
+        messages = [build_message(row.recipient, row.subject, row.body) for row in rows]
+        try:
+            errors = await mailer.send_batch(messages)
+        except Exception as e:
+            # The whole batch failed, e.g. the SMTP server is unreachable.
+            logger.warning("Email batch of %d failed: %s", len(rows), e)
+            errors = [str(e)] * len(rows)
+
+        sent_ids = []
+        failures = []
+        for row, error in zip(rows, errors):
+            if error is None:
+                sent_ids.append(row.id)
+                continue
+            attempts = row.attempts + 1
+            failures.append(
+                {
+                    "id": row.id,
+                    "attempts": attempts,
+                    "next_attempt_at": _next_attempt(now, attempts),
+                    "last_error": error[:1000],
+                }
+            )
+        async with async_session() as db:
+            await crud.complete_outbox(db, sent_ids, failures)
+
+        metrics.emails_sent.inc(len(sent_ids))
+        metrics.emails_failed.inc(len(failures))
+        total += len(sent_ids)
+        if len(rows) < batch_size:
+            break
+
+    return total
+
+
+async def run_outbox_loop() -> None:
+    while True:
+        try:
+            await dispatch_outbox()
+        except Exception:
+            logger.exception("Email outbox dispatch failed")
+        await asyncio.sleep(settings.EMAIL_OUTBOX_INTERVAL_SECONDS)
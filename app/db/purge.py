@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.db import crud
+from app.db.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_refresh_tokens(
+    batch_size: Optional[int] = None,
+    batch_pause: Optional[float] = None,
+    retention_days: Optional[int] = None,
+) -> int:
+    batch_size = batch_size or settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    if batch_pause is None:
+        batch_pause = settings.REFRESH_TOKEN_PURGE_BATCH_PAUSE_SECONDS
+    if retention_days is None:
+        retention_days = settings.REFRESH_TOKEN_PURGE_RETENTION_DAYS
+
+    # Expired rows get the same grace period as revoked ones, so the links
+    # of their still-live successors are not cut early.
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    total = 0
+    while True:
+        async with async_session() as db:
+            purged = await crud.purge_refresh_tokens(
+                db,
+                expired_before=cutoff,
+                revoked_before=cutoff,
+                limit=batch_size,
+            )
+        total += purged
+        if purged < batch_size:
+            break
+        await asyncio.sleep(batch_pause)
+
+    logger.info("Purged %d refresh tokens", total)
+    return total
+
+
+async def purge_revoked_access_tokens(
+    batch_size: Optional[int] = None,
+    batch_pause: Optional[float] = None,
+) -> int:
+    batch_size = batch_size or settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    if batch_pause is None:
+        batch_pause = settings.REFRESH_TOKEN_PURGE_BATCH_PAUSE_SECONDS
+
+    now = datetime.now(timezone.utc)
+    total = 0
+    while True:
+        async with async_session() as db:
+            purged = await crud.purge_revoked_access_tokens(
+                db, expired_before=now, limit=batch_size
+            )
+        total += purged
+        if purged < batch_size:
+            break
+        await asyncio.sleep(batch_pause)
+
+    logger.info("Purged %d revoked access tokens", total)
+    return total
+
+
+async def run_purge_loop() -> None:
+    while True:
+        try:
+            await purge_all()
+        except Exception:
+            logger.exception("Refresh token purge failed")
+        await asyncio.sleep(settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+
+
+async def purge_all(
+    batch_size: Optional[int] = None,
+    batch_pause: Optional[float] = None,
+    retention_days: Optional[int] = None,
+) -> tuple[int, int]:
+    refresh_tokens = await purge_refresh_tokens(
+        batch_size=batch_size, batch_pause=batch_pause, retention_days=retention_days
+    )
+    access_tokens = await purge_revoked_access_tokens(
+        batch_size=batch_size, batch_pause=batch_pause
+    )
+    return refresh_tokens, access_tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Delete expired and revoked refresh tokens "
+        "and expired access token revocations."
+    )
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--batch-pause", type=float)
+    parser.add_argument("--retention-days", type=int)
+    args = parser.parse_args()
+
+    refresh_tokens, access_tokens = asyncio.run(
+        purge_all(
+            batch_size=args.batch_size,
+            batch_pause=args.batch_pause,
+            retention_days=args.retention_days,
+        )
+    )
+    print(f"Purged {refresh_tokens} refresh tokens")
+    print(f"Purged {access_tokens} revoked access tokens")
+
+
+if __name__ == "__main__":
+    main()
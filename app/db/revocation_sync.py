@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.core.revocation import revocations
+from app.db import crud
+from app.db.database import async_session
+
+logger = logging.getLogger(__name__)
+
+# Rows are re-read for this long after the newest one seen, so a revocation
+# whose transaction committed after a later one is not skipped.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+_synced_through: Optional[datetime] = None
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def sync_revocations(full: bool = False) -> int:
+    global _synced_through
+
+    revoked_since = None
+    if not full and _synced_through is not None:
+        revoked_since = _synced_through - SYNC_OVERLAP
+
+    async with async_session() as db:
+        rows = await crud.get_revoked_access_tokens(
+            db, now=datetime.now(timezone.utc), revoked_since=revoked_since
+        )
+
+    for jti, expires_at, revoked_at in rows:
+        revocations.add(str(jti), _timestamp(expires_at))
+        if _synced_through is None or revoked_at > _synced_through:
+            _synced_through = revoked_at
+    revocations.prune()
+    return len(rows)
+
+
+async def run_revocation_sync_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.ACCESS_TOKEN_REVOCATION_SYNC_SECONDS)
+        try:
+            await sync_revocations()
+        except Exception:
+            logger.exception("Access token revocation sync failed")
@@ -1,6 +1,14 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator, UUID4
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    field_validator,
+    model_validator,
+    UUID4,
+)
 from datetime import datetime
 from typing import Optional
+from uuid import UUID
 
 
 class UserBase(BaseModel):
@@ -23,37 +31,162 @@ class UserCreate(UserAuth):
     email: EmailStr
 
 
+class UserLogin(BaseModel):
+    # A username or an email address, resolved by crud.get_user_by_login.
+    username: str = Field(..., min_length=3, max_length=254)
+    password: str = Field(..., min_length=8)
+
+
+class ForgotPassword(BaseModel):
+    email: EmailStr
+
+
+class PasswordReset(BaseModel):
+    token: str
+    new_password: str = Field(..., min_length=8)
+
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str = Field(..., min_length=8)
+
+
+class UserImport(UserBase):
+    email: EmailStr
+    password: Optional[str] = Field(None, min_length=8)
+    hashed_password: Optional[str] = None
+    is_active: bool = True
+    email_verified: bool = False
+
+    @model_validator(mode="after")
+    def validate_password(self):
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("Exactly one of password and hashed_password is required")
+        return self
+
+
+class UserImportResult(BaseModel):
+    read: int
+    inserted: int
+    conflicts: int
+    invalid: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: list[dict]
+
+
 class User(UserBase):
     email: EmailStr
-    id: int
+    id: UUID4
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class AdminUser(BaseModel):
+    # Output only: rows are reported as stored, without the input rules.
+    id: UUID4
+    username: str
+    email: str
     is_active: bool
+    is_superuser: bool
+    email_verified: bool
+    token_version: int
 
     class Config:
         from_attributes = True
 
 
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+
+
+class UserLookup(BaseModel):
+    ids: list[UUID4] = Field(default=[], max_length=1000)
+    usernames: list[str] = Field(default=[], max_length=1000)
+
+
+class UserLookupResult(BaseModel):
+    users: list[AdminUser]
+    missing_ids: list[UUID4]
+    missing_usernames: list[str]
+
+
+class PasswordHashGroup(BaseModel):
+    scheme: Optional[str] = None
+    params: dict
+    needs_update: bool
+    count: int
+
+
+class PasswordHashReport(BaseModel):
+    default_scheme: str
+    total: int
+    needs_update: int
+    groups: list[PasswordHashGroup]
+
+
 class RefreshTokenCreate(BaseModel):
     user_id: UUID4
     expires_at: datetime
 
 
 class RefreshTokenResponse(BaseModel):
-    id: UUID4
-    token: str
-    user_id: UUID4
-    is_active: bool
+    id: UUID
     created_at: datetime
     expires_at: datetime
-    previous_token_id: Optional[UUID4] = None
+    previous_token_id: Optional[UUID] = None
 
     class Config:
         from_attributes = True
 
 
+class SessionsPage(BaseModel):
+    items: list[RefreshTokenResponse]
+    next_cursor: Optional[str] = None
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
 
+class SessionsRevoked(BaseModel):
+    revoked: int
+    access_token: Optional[str] = None
+    token_type: Optional[str] = None
+
+
+class BulkSessionRevoke(BaseModel):
+    user_ids: list[UUID4] = Field(..., min_length=1, max_length=1000)
+
+
+class TokenIntrospect(BaseModel):
+    tokens: list[str] = Field(..., min_length=1, max_length=100)
+
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    token_type: Optional[str] = None
+    sub: Optional[str] = None
+    uid: Optional[UUID] = None
+    is_superuser: Optional[bool] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+
+
+class TokenIntrospectionResult(BaseModel):
+    results: list[TokenIntrospection]
+
+
 class TokenData(BaseModel):
     username: Optional[str] = None
+
+
+class TokenUser(BaseModel):
+    id: UUID4
+    username: str
+    is_active: bool
+    is_superuser: bool
+    token_version: int = 0
@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+import time
+import uuid
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.hashing import hasher, pwd_context
+from app.db import crud, schemas
+from app.db.database import async_session
+
+logger = logging.getLogger(__name__)
+
+# Only the first errors are kept in the summary; the CLI can write all of
+# them to a report file instead.
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.conflicts = 0
+        self.invalid = 0
+        self.errors: list[dict] = []
+        self.started_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def error(self, line: int, reason: str, username: Optional[str] = None) -> dict:
+        error = {"line": line, "reason": reason, "username": username}
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+        return error
+
+    def summary(self) -> dict:
+        elapsed = self.elapsed
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "conflicts": self.conflicts,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.read / elapsed, 1) if elapsed else 0.0,
+            "errors": self.errors,
+        }
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode()
+    if buffer:
+        yield buffer.decode()
+
+
+async def parse_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[tuple[int, dict]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+async def parse_csv(lines: AsyncIterable[str]) -> AsyncIterator[tuple[int, dict]]:
+    # One record per line, so a quoted field cannot span lines.
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        values = next(csv.reader([line.rstrip("\r")]))
+        if header is None:
+            header = values
+            continue
+        record = {key: value for key, value in zip(header, values) if value != ""}
+        yield line_number, record if len(values) == len(header) else None
+
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+
+async def _insert_batch(
+    batch: list[tuple[int, schemas.UserImport]],
+    stats: ImportStats,
+    hash_concurrency: int,
+    on_error: Optional[Callable[[dict], None]],
+) -> None:
+    plain = [user for _, user in batch if user.password is not None]
+    hashes = iter(
+        await hasher.hash_many([user.password for user in plain], hash_concurrency)
+    )
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": (
+                next(hashes) if user.password is not None else user.hashed_password
+            ),
+            "is_active": user.is_active,
+            "is_superuser": False,
+            "email_verified": user.email_verified,
+        }
+        for _, user in batch
+    ]
+
+    async with async_session() as db:
+        inserted = await crud.insert_users(db, rows)
+
+    stats.inserted += len(inserted)
+    # A username repeated within the batch is inserted once, the later rows
+    # are conflicts.
+    for line_number, user in batch:
+        if user.username in inserted:
+            inserted.discard(user.username)
+        else:
+            stats.conflicts += 1
+            error = stats.error(line_number, "conflict", user.username)
+            if on_error is not None:
+                on_error(error)
+
+
+async def import_users(
+    records: AsyncIterable[tuple[int, Optional[dict]]],
+    batch_size: Optional[int] = None,
+    hash_concurrency: Optional[int] = None,
+    on_progress: Optional[Callable[[ImportStats], None]] = None,
+    on_error: Optional[Callable[[dict], None]] = None,
+) -> ImportStats:
+    batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+    hash_concurrency = hash_concurrency or settings.USER_IMPORT_HASH_CONCURRENCY
+    stats = ImportStats()
+
+    batch: list[tuple[int, schemas.UserImport]] = []
+    async for line_number, record in records:
+        stats.read += 1
+        reason = None
+        if record is None:
+            reason = "malformed record"
+        else:
+            try:
+                user = schemas.UserImport(**record)
+            except ValidationError as e:
+                reason = "; ".join(error["msg"] for error in e.errors())
+            else:
+                if user.hashed_password is not None and not pwd_context.identify(
+                    user.hashed_password, required=False
+                ):
+                    reason = "unrecognised password hash"
+        if reason is not None:
+            stats.invalid += 1
+            error = stats.error(line_number, reason, (record or {}).get("username"))
+            if on_error is not None:
+                on_error(error)
+            continue
+
+        batch.append((line_number, user))
+        if len(batch) >= batch_size:
+            await _insert_batch(batch, stats, hash_concurrency, on_error)
+            batch = []
+            if on_progress is not None:
+                on_progress(stats)
+
+    if batch:
+        await _insert_batch(batch, stats, hash_concurrency, on_error)
+        if on_progress is not None:
+            on_progress(stats)
+
+    logger.info(
+        "Imported %d of %d users (%d conflicts, %d invalid)",
+        stats.inserted,
+        stats.read,
+        stats.conflicts,
+        stats.invalid,
+    )
+    return stats
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def _print_progress(stats: ImportStats) -> None:
+    print(
+        f"read {stats.read}, inserted {stats.inserted}, "
+        f"conflicts {stats.conflicts}, invalid {stats.invalid}, "
+        f"{stats.read / stats.elapsed:.0f} rows/s",
+        file=sys.stderr,
+    )
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    report = open(args.errors, "w") if args.errors else None
+
+    def write_error(error: dict) -> None:
+        report.write(json.dumps(error) + "\n")
+
+    try:
+        stats = await import_users(
+            PARSERS[import_format](_file_lines(args.path)),
+            batch_size=args.batch_size,
+            # Nothing else hashes in a CLI run, so it may use every slot.
+            hash_concurrency=args.hash_concurrency or hasher.max_concurrency,
+            on_progress=_print_progress,
+            on_error=write_error if report is not None else None,
+        )
+    finally:
+        if report is not None:
+            report.close()
+        hasher.shutdown()
+    return stats.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import users from NDJSON or CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(PARSERS))
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--hash-concurrency", type=int)
+    parser.add_argument("--errors", help="write every rejected row to this NDJSON file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(_run(args))
+    summary.pop("errors")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,49 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from app import api
 from app.api.root import router as root_router
+from app.core.config import settings
+from app.core.hashing import hasher
+from app.core.metrics import RequestMetricsMiddleware
+from app.core.revocation import revocations
+from app.core.security import BearerAuthMiddleware
 
 from app.db.database import engine
 from app.db import models
+from app.db.outbox import run_outbox_loop
+from app.db.purge import run_purge_loop
+from app.db.revocation_sync import run_revocation_sync_loop, sync_revocations
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(models.Base.metadata.create_all)
+
+    await sync_revocations(full=True)
+    await revocations.transport.start()
+    tasks = [
+        asyncio.create_task(run_revocation_sync_loop()),
+        asyncio.create_task(run_outbox_loop()),
+    ]
+    if settings.REFRESH_TOKEN_PURGE_ENABLED:
+        tasks.append(asyncio.create_task(run_purge_loop()))
+
     yield
 
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await revocations.transport.stop()
+    hasher.shutdown()
+
 
 app = FastAPI(lifespan=lifespan)
+if settings.AUTH_MIDDLEWARE:
+    app.add_middleware(BearerAuthMiddleware, paths=settings.AUTH_MIDDLEWARE_PATHS)
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(api.router, prefix="/api")
 app.include_router(root_router, prefix="")
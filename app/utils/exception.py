@@ -26,6 +26,26 @@ class ServerException:
             detail="Incorrect username or password",
         )
 
+    @staticmethod
+    def invalid_email_token():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired email token",
+        )
+
+    @staticmethod
+    def invalid_reset_token():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired reset token",
+        )
+
+    @staticmethod
+    def incorrect_password():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect password"
+        )
+
     @staticmethod
     def invalid_refresh_token():
         raise HTTPException(
@@ -72,6 +92,14 @@ class ServerException:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    @staticmethod
+    def invalid_client():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid client credentials",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+
     @staticmethod
     def inactive_user():
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -79,3 +107,39 @@ class ServerException:
     @staticmethod
     def not_superuser():
         raise HTTPException(status_code=403, detail="You not superuser")
+
+    @staticmethod
+    def user_does_not_exist():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User does not exist"
+        )
+
+    @staticmethod
+    def invalid_cursor():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    @staticmethod
+    def password_hashing_overloaded(retry_after: int):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    @staticmethod
+    def too_many_login_attempts(retry_after: int):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    @staticmethod
+    def too_many_requests(retry_after: int):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
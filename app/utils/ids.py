@@ -0,0 +1,14 @@
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    # RFC 9562: 48-bit unix millisecond timestamp, then version, variant and
+    # random bits, so ids sort by creation time.
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
@@ -0,0 +1,146 @@
+from pathlib import Path
+from typing import Iterable
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jose import jwk
+from jose.backends.base import Key
+from jose.constants import ALGORITHMS
+from jose.exceptions import JWKError
+from jose.utils import base64url_decode, base64url_encode
+
+from app.core.config import settings
+
+
+EDDSA = "EdDSA"
+
+_EC_ALGORITHMS = {
+    "secp256r1": ALGORITHMS.ES256,
+    "secp384r1": ALGORITHMS.ES384,
+    "secp521r1": ALGORITHMS.ES512,
+}
+
+
+class Ed25519Key(Key):
+    # python-jose 3.3 has no OKP support, this fills the gap for EdDSA.
+    def __init__(self, key, algorithm):
+        if algorithm != EDDSA:
+            raise JWKError(f"hash_alg: {algorithm} is not a valid hash algorithm")
+        self._algorithm = algorithm
+
+        if isinstance(key, dict):
+            key = self._process_jwk(key)
+        elif isinstance(key, (str, bytes)):
+            key = _load_pem(key.encode() if isinstance(key, str) else key)
+        if not isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+            raise JWKError("Unable to parse an Ed25519 key")
+
+        self.prepared_key = key
+        if isinstance(key, ed25519.Ed25519PrivateKey):
+            self._public_key = key.public_key()
+        else:
+            self._public_key = key
+
+    def _process_jwk(self, jwk_dict):
+        if jwk_dict.get("kty") != "OKP" or jwk_dict.get("crv") != "Ed25519":
+            raise JWKError("Incorrect key type. Expected: 'OKP' with 'Ed25519'")
+        if "d" in jwk_dict:
+            return ed25519.Ed25519PrivateKey.from_private_bytes(
+                base64url_decode(jwk_dict["d"].encode())
+            )
+        return ed25519.Ed25519PublicKey.from_public_bytes(
+            base64url_decode(jwk_dict["x"].encode())
+        )
+
+    def sign(self, msg):
+        return self.prepared_key.sign(msg)
+
+    def verify(self, msg, sig):
+        try:
+            self._public_key.verify(sig, msg)
+            return True
+        except InvalidSignature:
+            return False
+
+    def is_public(self):
+        return self.prepared_key is self._public_key
+
+    def public_key(self):
+        if self.is_public():
+            return self
+        return self.__class__(self._public_key, self._algorithm)
+
+    def to_pem(self):
+        if self.is_public():
+            return self.prepared_key.public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        return self.prepared_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+
+    def to_dict(self):
+        public_bytes = self._public_key.public_bytes(
+            encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
+        )
+        data = {
+            "alg": self._algorithm,
+            "kty": "OKP",
+            "crv": "Ed25519",
+            "x": base64url_encode(public_bytes).decode("ASCII"),
+        }
+        if not self.is_public():
+            private_bytes = self.prepared_key.private_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PrivateFormat.Raw,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+            data["d"] = base64url_encode(private_bytes).decode("ASCII")
+        return data
+
+
+jwk.register_key(EDDSA, Ed25519Key)
+
+
+def _load_pem(data: bytes):
+    try:
+        return serialization.load_pem_public_key(data)
+    except ValueError:
+        return serialization.load_pem_private_key(data, password=None)
+
+
+def algorithm_for(key) -> str:
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        # ALGORITHM only picks the digest for RSA keys, every other key type
+        # has exactly one algorithm.
+        if settings.ALGORITHM in ALGORITHMS.RSA_DS:
+            return settings.ALGORITHM
+        return ALGORITHMS.RS256
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        algorithm = _EC_ALGORITHMS.get(key.curve.name)
+        if algorithm is None:
+            raise RuntimeError(f"Unsupported EC curve: {key.curve.name}")
+        return algorithm
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return EDDSA
+    raise RuntimeError(f"Unsupported key type: {type(key).__name__}")
+
+
+def parse_key(pem: str) -> tuple[Key, str]:
+    try:
+        key = _load_pem(pem.encode())
+    except Exception as e:
+        raise RuntimeError(f"Failed to parse JWT key: {str(e)}")
+    algorithm = algorithm_for(key)
+    return jwk.construct(pem, algorithm), algorithm
+
+
+def load_key_files(paths: Iterable[Path]) -> list[str]:
+    try:
+        return [path.read_text() for path in paths]
+    except Exception as e:
+        raise RuntimeError(f"Failed to load JWT keys: {str(e)}")
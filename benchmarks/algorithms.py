@@ -0,0 +1,74 @@
+import argparse
+from datetime import datetime, timedelta
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jose import jwt
+
+from app.utils import signing_keys
+from benchmarks.common import report
+from benchmarks.micro import run
+
+
+def generate_keys() -> dict:
+    return {
+        "RS256": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ES256": ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+
+
+def to_pem(private_key) -> tuple[str, str]:
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem.decode(), public_pem.decode()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sign and verify throughput per JWT signature algorithm."
+    )
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    claims = {
+        "sub": "benchmark",
+        "uid": "00000000-0000-0000-0000-000000000000",
+        "is_active": True,
+        "is_superuser": False,
+        "ver": 0,
+        "exp": datetime.utcnow() + timedelta(minutes=5),
+    }
+
+    results = {}
+    for name, private_key in generate_keys().items():
+        private_pem, public_pem = to_pem(private_key)
+        signing_key, algorithm = signing_keys.parse_key(private_pem)
+        verifying_key, _ = signing_keys.parse_key(public_pem)
+        token = jwt.encode(claims, signing_key, algorithm=algorithm)
+
+        results[f"sign[{name}]"] = run(
+            lambda: jwt.encode(claims, signing_key, algorithm=algorithm),
+            args.duration,
+            1,
+        )
+        results[f"verify[{name}]"] = run(
+            lambda: jwt.decode(token, verifying_key, algorithms=[algorithm]),
+            args.duration,
+            1,
+        )
+        results[f"token_bytes[{name}]"] = len(token)
+
+    report("algorithms", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import security
+from app.core.config import settings
+from app.db import models
+from app.db.database import get_db
+from benchmarks.common import Timer, report, summarize
+
+PATH = "/api/v1/users/me/ping"
+
+
+def dependency_app(session_factory) -> FastAPI:
+    app = FastAPI()
+
+    async def get_bench_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_bench_db
+
+    @app.get(PATH)
+    async def ping(current_user=Depends(security.get_current_active_user)):
+        return {"id": str(current_user.id)}
+
+    return app
+
+
+def middleware_app(session_factory) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        security.BearerAuthMiddleware,
+        paths=["/api/v1/users/me"],
+        session_factory=session_factory,
+    )
+
+    @app.get(PATH)
+    async def ping(current_user=Depends(security.get_request_active_user)):
+        return {"id": str(current_user.id)}
+
+    return app
+
+
+async def drive(app: FastAPI, token: str, requests: int, concurrency: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for _ in counter:
+                started_at = time.perf_counter()
+                response = await client.get(PATH, headers=headers)
+                latencies.append(time.perf_counter() - started_at)
+                if response.status_code >= 400:
+                    errors += 1
+
+    with Timer() as timer:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, timer.elapsed, errors)
+
+
+async def main_async(args) -> dict:
+    engine = create_async_engine(args.database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    try:
+        async with session_factory() as db:
+            user = models.User(
+                username=f"bench{time.time_ns()}",
+                email=f"bench{time.time_ns()}@example.com",
+                hashed_password="",
+                is_active=True,
+            )
+            db.add(user)
+            await db.commit()
+        token = security.create_user_access_token(user)
+
+        results = {}
+        for name, app in (
+            ("dependency_chain", dependency_app(session_factory)),
+            ("middleware", middleware_app(session_factory)),
+        ):
+            # Warm the verified token and user caches before timing.
+            await drive(app, token, args.concurrency, args.concurrency)
+            results[name] = await drive(app, token, args.requests, args.concurrency)
+        return results
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-route Depends chain vs. ASGI bearer middleware."
+    )
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    options = {**vars(args), "stateless": settings.STATELESS_ACCESS_TOKENS}
+    report("auth_middleware", results, options, args.output)
+
+
+if __name__ == "__main__":
+    main()
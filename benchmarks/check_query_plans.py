@@ -0,0 +1,94 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, desc, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+def explain(session: Session, statement) -> str:
+    compiled = statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def seed(session: Session, users: int = 200, tokens_per_user: int = 20) -> list:
+    now = datetime.utcnow()
+    user_ids = []
+    for i in range(users):
+        user = models.User(
+            id=uuid.uuid4(), username=f"user{i}", email=f"user{i}@example.com"
+        )
+        session.add(user)
+        user_ids.append(user.id)
+        previous_token_id = None
+        for j in range(tokens_per_user):
+            token = models.RefreshToken(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                is_active=j % 3 == 0,
+                created_at=now - timedelta(minutes=j),
+                expires_at=now + timedelta(days=30),
+                previous_token_id=previous_token_id,
+            )
+            session.add(token)
+            previous_token_id = token.id
+    session.commit()
+    session.execute(text("ANALYZE"))
+    return user_ids
+
+
+def main():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        user_ids = seed(session)
+
+        sessions_query = (
+            select(
+                models.RefreshToken.id,
+                models.RefreshToken.created_at,
+                models.RefreshToken.expires_at,
+                models.RefreshToken.previous_token_id,
+            )
+            .filter(models.RefreshToken.user_id == user_ids[0])
+            .filter(models.RefreshToken.is_active)
+            .order_by(
+                desc(models.RefreshToken.created_at), desc(models.RefreshToken.id)
+            )
+            .limit(21)
+        )
+        sessions_plan = explain(session, sessions_query)
+        print(sessions_plan)
+        assert "ix_refresh_tokens_user_active_created_id" in sessions_plan
+        assert "TEMP B-TREE" not in sessions_plan
+
+        next_page_plan = explain(
+            session,
+            sessions_query.filter(
+                tuple_(models.RefreshToken.created_at, models.RefreshToken.id)
+                < tuple_(datetime.utcnow(), uuid.uuid4())
+            ),
+        )
+        print(next_page_plan)
+        assert "ix_refresh_tokens_user_active_created_id" in next_page_plan
+        assert "TEMP B-TREE" not in next_page_plan
+
+        chain_plan = explain(
+            session,
+            select(models.RefreshToken.id).filter(
+                models.RefreshToken.previous_token_id == uuid.uuid4()
+            ),
+        )
+        print(chain_plan)
+        assert "ix_refresh_tokens_previous_token_id" in chain_plan
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    to_ms = 1000.0
+    return {
+        "operations": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * to_ms, 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * to_ms, 4),
+            "p95": round(percentile(latencies, 95) * to_ms, 4),
+            "p99": round(percentile(latencies, 99) * to_ms, 4),
+            "max": round(max(latencies) * to_ms, 4) if latencies else 0.0,
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(kind: str, results: dict, options: dict, output: Optional[str]) -> None:
+    document = {
+        "kind": kind,
+        "commit": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "options": options,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+class Timer:
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started_at
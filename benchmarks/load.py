@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import get_db
+from app.main import app
+from benchmarks.common import Timer, report, summarize
+
+PASSWORD = "benchmark-password"
+SCENARIOS = ("register", "login", "refresh", "logout", "authenticated_reads")
+
+
+def make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+
+
+async def register(client: httpx.AsyncClient, username: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "username": username,
+            "password": PASSWORD,
+            "email": f"{username}@example.com",
+        },
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+Operation = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+async def drive(
+    clients: list[httpx.AsyncClient],
+    requests: int,
+    operation: Operation,
+    prepare: Optional[Operation] = None,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for i in counter:
+            if prepare is not None:
+                await prepare(client, i)
+            started_at = time.perf_counter()
+            response = await operation(client, i)
+            latencies.append(time.perf_counter() - started_at)
+            if response.status_code >= 400:
+                errors += 1
+
+    with Timer() as timer:
+        await asyncio.gather(*(worker(client) for client in clients))
+    return summarize(latencies, timer.elapsed, errors)
+
+
+async def run_scenarios(args) -> dict:
+    prefix = uuid.uuid4().hex[:8]
+    clients = [make_client() for _ in range(args.concurrency)]
+    tokens = [await register(client, f"b{prefix}u{i}") for i, client in enumerate(clients)]
+    results = {}
+
+    try:
+        if "register" in args.scenario:
+            results["register"] = await drive(
+                clients,
+                args.requests,
+                lambda client, i: client.post(
+                    "/api/v1/auth/register",
+                    json={
+                        "username": f"b{prefix}r{i}",
+                        "password": PASSWORD,
+                        "email": f"b{prefix}r{i}@example.com",
+                    },
+                ),
+            )
+
+        if "login" in args.scenario:
+            results["login_storm"] = await drive(
+                clients,
+                args.requests,
+                lambda client, i: client.post(
+                    "/api/v1/auth/login",
+                    json={
+                        "username": f"b{prefix}u{i % args.concurrency}",
+                        "password": PASSWORD,
+                    },
+                ),
+            )
+
+        if "refresh" in args.scenario:
+            # Each client keeps rotating its own refresh cookie.
+            results["refresh_steady_state"] = await drive(
+                clients,
+                args.requests,
+                lambda client, i: client.post("/api/v1/auth/refresh"),
+            )
+
+        if "authenticated_reads" in args.scenario:
+            bearer = {
+                id(client): {"Authorization": f"Bearer {token}"}
+                for client, token in zip(clients, tokens)
+            }
+            paths = ("/api/v1/users/me", "/api/v1/users/me/sessions")
+            results["authenticated_reads"] = await drive(
+                clients,
+                args.requests,
+                lambda client, i: client.get(
+                    paths[i % len(paths)], headers=bearer[id(client)]
+                ),
+            )
+
+        if "logout" in args.scenario:
+            results["logout"] = await drive(
+                clients,
+                args.requests,
+                lambda client, i: client.delete("/api/v1/auth/logout"),
+                prepare=lambda client, i: client.post(
+                    "/api/v1/auth/login",
+                    json={
+                        "username": f"b{prefix}u{i % args.concurrency}",
+                        "password": PASSWORD,
+                    },
+                ),
+            )
+    finally:
+        for client in clients:
+            await client.aclose()
+
+    return results
+
+
+async def main_async(args) -> dict:
+    engine = create_async_engine(args.database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_bench_db
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    try:
+        return await run_scenarios(args)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent auth endpoint load test.")
+    parser.add_argument(
+        "--database-url",
+        default="sqlite+aiosqlite:///bench.db",
+        help="defaults to a local SQLite stand-in; pass a postgresql+asyncpg URL "
+        "to run against Postgres",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="repeatable"
+    )
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS)
+
+    results = asyncio.run(main_async(args))
+    report("load", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import time
+from datetime import timedelta
+from typing import Callable
+
+from jose import jwt
+
+from app.core import hashing, security
+from app.core.keys import key_store
+from benchmarks.common import report, summarize
+
+
+def run(func: Callable, duration: float, min_operations: int) -> dict:
+    latencies = []
+    started_at = time.perf_counter()
+    deadline = started_at + duration
+    while time.perf_counter() < deadline or len(latencies) < min_operations:
+        op_started_at = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - op_started_at)
+    return summarize(latencies, time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token and password micro-benchmarks.")
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    token = security.create_access_token(
+        data={"sub": "benchmark"}, expires_delta=timedelta(minutes=5)
+    )
+
+    def verify_uncached():
+        security.verified_tokens.clear()
+        security.verify_token(token)
+
+    # Key parsing cost: decoding against the PEM string re-parses it per call.
+    keys = key_store.get()
+    verifying_key = keys.verifying_keys[keys.kid][0]
+
+    results = {
+        "create_access_token": run(
+            lambda: security.create_access_token(data={"sub": "benchmark"}),
+            args.duration,
+            1,
+        ),
+        "jwt_decode_pem": run(
+            lambda: jwt.decode(token, keys.public_pem, algorithms=[keys.algorithm]),
+            args.duration,
+            1,
+        ),
+        "jwt_decode_parsed_key": run(
+            lambda: jwt.decode(token, verifying_key, algorithms=[keys.algorithm]),
+            args.duration,
+            1,
+        ),
+        "verify_token": run(verify_uncached, args.duration, 1),
+        "verify_token_cached": run(
+            lambda: security.verify_token(token), args.duration, 1
+        ),
+    }
+
+    # Timed synchronously on purpose: this is the raw CPU cost per scheme,
+    # independent of the worker pool in front of it.
+    password = "benchmark-password"
+    for scheme in hashing.pwd_context.schemes():
+        hashed = hashing.pwd_context.hash(password, scheme=scheme)
+        results[f"verify_password[{scheme}]"] = run(
+            lambda: hashing.pwd_context.verify(password, hashed), args.duration, 5
+        )
+
+    report("micro", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Add users.token_version
+
+Revision ID: 5b1e7c2a9d43
+Revises: 03fd5b3cd708
+Create Date: 2026-10-18 10:12:41.208113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e7c2a9d43"
+down_revision: Union[str, None] = "03fd5b3cd708"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
@@ -0,0 +1,53 @@
+"""Add id to the active refresh token index for keyset paging
+
+Revision ID: 7f3a1c5d8e20
+Revises: e2a7b4c91f06
+Create Date: 2026-10-18 15:21:09.317204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7f3a1c5d8e20"
+down_revision: Union[str, None] = "e2a7b4c91f06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The new index is built before the old one is dropped, so session
+    # listing never runs without an index.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_user_active_created_id",
+            "refresh_tokens",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_user_active_created",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_user_active_created",
+            "refresh_tokens",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_user_active_created_id",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,68 @@
+"""Refresh token hot-query indexes
+
+Revision ID: 9c4d2f61e8b7
+Revises: 5b1e7c2a9d43
+Create Date: 2026-10-18 14:02:17.530941
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4d2f61e8b7"
+down_revision: Union[str, None] = "5b1e7c2a9d43"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and refresh_tokens is too
+    # large to lock for a regular CREATE INDEX.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_user_active_created",
+            "refresh_tokens",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_refresh_tokens_previous_token_id",
+            "refresh_tokens",
+            ["previous_token_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_id",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_users_id", table_name="users", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_id", "users", ["id"], unique=True, postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_refresh_tokens_id",
+            "refresh_tokens",
+            ["id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_previous_token_id",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_user_active_created",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
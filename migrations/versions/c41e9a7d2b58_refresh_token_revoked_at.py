@@ -0,0 +1,45 @@
+"""Add revoked_at to refresh_tokens
+
+Revision ID: c41e9a7d2b58
+Revises: b5d82e0f3a17
+Create Date: 2026-10-18 20:31:44.120957
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41e9a7d2b58"
+down_revision: Union[str, None] = "b5d82e0f3a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows revoked before this column existed keep NULL and are purged only
+    # once they expire.
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_revoked_at",
+            "refresh_tokens",
+            ["revoked_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_refresh_tokens_revoked_at",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("refresh_tokens", "revoked_at")
@@ -0,0 +1,54 @@
+"""Add revoked_access_tokens
+
+Revision ID: e2a7b4c91f06
+Revises: 9c4d2f61e8b7
+Create Date: 2026-10-18 14:03:27.540916
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7b4c91f06"
+down_revision: Union[str, None] = "9c4d2f61e8b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_access_tokens",
+        sa.Column("jti", sa.Uuid(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "revoked_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index(
+        "ix_revoked_access_tokens_expires_at",
+        "revoked_access_tokens",
+        ["expires_at"],
+    )
+    op.create_index(
+        "ix_revoked_access_tokens_revoked_at",
+        "revoked_access_tokens",
+        ["revoked_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_revoked_access_tokens_revoked_at", table_name="revoked_access_tokens"
+    )
+    op.drop_index(
+        "ix_revoked_access_tokens_expires_at", table_name="revoked_access_tokens"
+    )
+    op.drop_table("revoked_access_tokens")